@@ -0,0 +1,220 @@
+"""Асинхронные представления для самых нагруженных запросов на чтение.
+
+Подключаются при SERVER_MODE=asgi. Всё, что быстрый путь не обслуживает
+сам (запись, браузерный API, ошибки аутентификации и фильтров),
+передаётся синхронным вьюсетам, поэтому ответы в обоих режимах
+одинаковы.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from api.authentication import token_cache
+from api.fast_serializers import FastRecipeListSerializer
+from api.filters import RecipeFilter
+from api.indexes import ingredient_index, parse_limit, recipe_ids
+from api.pagination import LimitPagination
+from api.renderers import ORJSONRenderer
+from api.response_cache import response_cache
+from api.serializers import RecipeListSerializer
+from api.short_links import clicks, decode
+from api.views import IngredientViewSet, RecipeViewSet
+from recipes.models import Recipe
+
+recipe_list_view = RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='recipes', detail=False
+)
+recipe_detail_view = RecipeViewSet.as_view(
+    {
+        'get': 'retrieve', 'put': 'update',
+        'patch': 'partial_update', 'delete': 'destroy'
+    },
+    basename='recipes', detail=True
+)
+ingredient_list_view = IngredientViewSet.as_view(
+    {'get': 'list'}, basename='ingredients', detail=False
+)
+
+
+def is_fast_path(request):
+    """GET с ответом в JSON; браузерный API рендерит синхронный вьюсет."""
+    return (
+        request.method == 'GET'
+        and request.GET.get('format', 'json') == 'json'
+        and 'text/html' not in request.headers.get('Accept', '')
+    )
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    response = HttpResponse(
+        (
+            ORJSONRenderer if settings.FAST_SERIALIZERS else JSONRenderer
+        )().render(data),
+        content_type='application/json',
+        status=status_code,
+        headers=headers
+    )
+    response['Vary'] = 'Accept'
+    return response
+
+
+async def authenticate(request):
+    """Пользователь по заголовку «Authorization: Token <key>».
+
+    None означает ошибку аутентификации: её ответ строит DRF.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != 'token':
+        return AnonymousUser()
+    if len(header) != 2:
+        return None
+    cached = await token_cache.aget(header[1])
+    if cached is not None:
+        return cached[0]
+    generation = token_cache.generation
+    try:
+        token = await Token.objects.select_related('user').aget(
+            key=header[1]
+        )
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+    await token_cache.aset(header[1], token.user, token, generation)
+    return token_cache.snapshot(token.user, token)[0]
+
+
+async def get_request(request):
+    """DRF Request с пользователем или None, если нужен синхронный путь."""
+    if not is_fast_path(request):
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+    drf_request = Request(request)
+    drf_request.user = user
+    return drf_request
+
+
+def in_thread(func):
+    """Вызов в пуле потоков без привязки к потоку ORM: кешу он не нужен."""
+    return sync_to_async(func, thread_sensitive=False)
+
+
+async def cached_response(request, tags, render, get_data_tags):
+    """Асинхронный аналог RecipeViewSet._cached_response."""
+    if request.user.is_authenticated:
+        return json_response(await render())
+    key = response_cache.make_key(request)
+    data = await in_thread(response_cache.get)(key)
+    if data is not None:
+        return json_response(data, headers={'X-Cache': 'HIT'})
+    versions = await in_thread(response_cache.get_versions)(tags)
+    data = await render()
+    await in_thread(response_cache.set)(
+        key, data, get_data_tags(data), versions
+    )
+    return json_response(data, headers={'X-Cache': 'MISS'})
+
+
+async def recipe_list(request):
+    drf_request = await get_request(request)
+    if drf_request is None:
+        return await sync_to_async(recipe_list_view)(request)
+    filterset = RecipeFilter(
+        drf_request.query_params,
+        queryset=Recipe.objects.with_user_flags(drf_request.user),
+        request=drf_request
+    )
+    if 'author' in drf_request.query_params:
+        # ModelChoiceFilter проверяет автора запросом к базе.
+        is_valid = await sync_to_async(filterset.is_valid)()
+    else:
+        is_valid = filterset.is_valid()
+    if not is_valid:
+        return await sync_to_async(recipe_list_view)(request)
+
+    async def render():
+        paginator = LimitPagination()
+        page = await paginator.apaginate_queryset(
+            filterset.qs, drf_request, RecipeViewSet
+        )
+        serializer_class = (
+            FastRecipeListSerializer if settings.FAST_SERIALIZERS
+            else RecipeListSerializer
+        )
+        serializer = serializer_class(
+            page, many=True, context={'request': drf_request}
+        )
+        return paginator.get_paginated_response(serializer.data).data
+
+    try:
+        return await cached_response(
+            drf_request,
+            ['recipes:list'],
+            render,
+            lambda data: {
+                f'author:{recipe["author"]["id"]}'
+                for recipe in data['results']
+            }
+        )
+    except APIException as exc:
+        # Неверная страница или курсор: ответ как у синхронного вьюсета.
+        response = exception_handler(exc, {})
+        return json_response(response.data, response.status_code)
+
+
+async def recipe_detail(request, pk):
+    drf_request = await get_request(request)
+    if drf_request is None:
+        return await sync_to_async(recipe_detail_view)(request, pk=pk)
+
+    async def render():
+        try:
+            recipe = await Recipe.objects.with_user_flags(
+                drf_request.user
+            ).aget(pk=pk)
+        except Recipe.DoesNotExist:
+            # Текст как у get_object_or_404 в синхронном retrieve.
+            raise NotFound(
+                f'No {Recipe._meta.object_name} matches the given query.'
+            )
+        return RecipeListSerializer(
+            recipe, context={'request': drf_request}
+        ).data
+
+    try:
+        return await cached_response(
+            drf_request,
+            [f'recipe:{pk}'],
+            render,
+            lambda data: {f'author:{data["author"]["id"]}'}
+        )
+    except NotFound as exc:
+        return json_response(
+            {'detail': exc.detail}, status.HTTP_404_NOT_FOUND
+        )
+
+
+async def ingredient_list(request):
+    if not is_fast_path(request) or await authenticate(request) is None:
+        return await sync_to_async(ingredient_list_view)(request)
+    return json_response(await ingredient_index.asearch(
+        request.GET.get('name', ''), parse_limit(request.GET.get('limit'))
+    ))
+
+
+async def redirect_to_recipe(request, id=None, code=None):
+    pk = id if code is None else decode(code)
+    if pk is None or not await recipe_ids.acontains(pk):
+        raise Http404('Рецепт не найден.')
+    clicks.add(pk)
+    return redirect(f'/recipes/{pk}/')
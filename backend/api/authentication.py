@@ -0,0 +1,168 @@
+"""Аутентификация по токену с кешем пользователя.
+
+Пользователь и токен по ключу хранятся в LRU процесса с коротким TTL
+и, если задан AUTH_TOKEN_CACHE_ALIAS, в общем кеше. Удаление токена
+(выход через djoser) и сохранение пользователя сбрасывают обе копии
+(см. api.signals): в этом процессе сразу, в остальных — не позже чем
+через AUTH_TOKEN_CACHE_TTL.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram.constants import (AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL,
+                                AUTH_TOKEN_SHARED_CACHE_TTL)
+
+SHARED_KEY = 'auth_token:{}'
+
+
+class TokenCache:
+
+    def __init__(self, alias, size, ttl, shared_ttl):
+        self.alias = alias
+        self.size = size
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.stats = Counter()
+        # Растёт при каждой инвалидации: ответ базы, прочитанный до неё,
+        # в кеш не попадает.
+        self.generation = 0
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    @staticmethod
+    def make_key(key):
+        """Ключ общего кеша без самого токена."""
+        return SHARED_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+    @staticmethod
+    def snapshot(user, token):
+        """Копии для запроса: изменения во view не попадут в кеш."""
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def get_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.stats['local_hits'] += 1
+        return self.snapshot(user, token)
+
+    def set_local(self, key, user, token, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def found_shared(self, key, cached, generation):
+        if cached is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['shared_hits'] += 1
+        self.set_local(key, *cached, generation)
+        return self.snapshot(*cached)
+
+    def get(self, key):
+        cached = self.get_local(key)
+        if cached is not None:
+            return cached
+        generation = self.generation
+        shared = self.shared
+        return self.found_shared(
+            key,
+            shared.get(self.make_key(key)) if shared is not None else None,
+            generation
+        )
+
+    async def aget(self, key):
+        cached = self.get_local(key)
+        if cached is not None:
+            return cached
+        generation = self.generation
+        shared = self.shared
+        return self.found_shared(
+            key,
+            (
+                await shared.aget(self.make_key(key))
+                if shared is not None else None
+            ),
+            generation
+        )
+
+    def set(self, key, user, token, generation):
+        """Сохраняет ответ базы, если после generation не было сбросов."""
+        self.set_local(key, user, token, generation)
+        shared = self.shared
+        if shared is not None and generation == self.generation:
+            shared.set(self.make_key(key), (user, token), self.shared_ttl)
+
+    async def aset(self, key, user, token, generation):
+        self.set_local(key, user, token, generation)
+        shared = self.shared
+        if shared is not None and generation == self.generation:
+            await shared.aset(
+                self.make_key(key), (user, token), self.shared_ttl
+            )
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self.shared
+        if shared is not None and keys:
+            shared.delete_many([self.make_key(key) for key in keys])
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = {
+                key for key, (_, user, _) in self._entries.items()
+                if user.pk == user_id
+            }
+        if self.shared is not None:
+            keys.update(Token.objects.filter(
+                user_id=user_id
+            ).values_list('key', flat=True))
+        self.invalidate(*keys)
+
+
+token_cache = TokenCache(
+    settings.AUTH_TOKEN_CACHE_ALIAS, AUTH_TOKEN_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TTL, AUTH_TOKEN_SHARED_CACHE_TTL
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе при попадании в кеш."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = token_cache.generation
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, generation)
+        return token_cache.snapshot(user, token)
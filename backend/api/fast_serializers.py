@@ -0,0 +1,117 @@
+"""Сериализаторы списков без полей DRF.
+
+Включаются настройкой FAST_SERIALIZERS. Строят словари прямо из
+подгруженных объектов: тот же состав и порядок ключей, что у
+RecipeListSerializer и SubscribeSerializer, но без создания полей
+и вызова to_representation для каждого значения. Годятся только
+для чтения и ожидают prefetch из with_user_flags и subscriptions.
+"""
+from api.images import get_srcset
+
+
+def file_url(request, file):
+    """Как ImageField.to_representation: абсолютный URL или None."""
+    if not file:
+        return None
+    return request.build_absolute_uri(file.url)
+
+
+def user_to_dict(user, request):
+    if hasattr(user, 'is_subscribed'):
+        is_subscribed = user.is_subscribed
+    elif request.user.is_anonymous:
+        is_subscribed = False
+    else:
+        is_subscribed = user.subscribing.filter(user=request.user).exists()
+    return {
+        'email': user.email,
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_subscribed': is_subscribed,
+        'avatar': file_url(request, user.avatar),
+        'avatar_srcset': get_srcset(request, user.avatar_variants),
+    }
+
+
+def ingredient_to_dict(item):
+    ingredient = item.ingredient
+    return {
+        'id': ingredient.id,
+        'name': ingredient.name,
+        'measurement_unit': ingredient.measurement_unit,
+        'amount': item.amount,
+    }
+
+
+def recipe_to_dict(recipe, request):
+    return {
+        'id': recipe.id,
+        'author': user_to_dict(recipe.author, request),
+        'ingredients': [
+            ingredient_to_dict(item)
+            for item in recipe.recipe_ingredients.all()
+        ],
+        'is_favorited': recipe.is_favorited,
+        'is_in_shopping_cart': recipe.is_in_shopping_cart,
+        'name': recipe.name,
+        'image': file_url(request, recipe.image),
+        'image_srcset': get_srcset(request, recipe.image_variants),
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+    }
+
+
+def recipe_mini_to_dict(recipe, request):
+    return {
+        'id': recipe.id,
+        'name': recipe.name,
+        'image': file_url(request, recipe.image),
+        'image_srcset': get_srcset(request, recipe.image_variants),
+        'cooking_time': recipe.cooking_time,
+    }
+
+
+def subscription_to_dict(author, request):
+    data = user_to_dict(author, request)
+    return {
+        'email': data['email'],
+        'id': data['id'],
+        'username': data['username'],
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'is_subscribed': data['is_subscribed'],
+        'recipes': [
+            recipe_mini_to_dict(recipe, request)
+            for recipe in author.limited_recipes
+        ],
+        'recipes_count': author.recipes_count,
+        'avatar': data['avatar'],
+        'avatar_srcset': data['avatar_srcset'],
+    }
+
+
+class FastSerializer:
+    """Интерфейс сериализатора DRF для выдачи: конструктор и data."""
+    to_dict = None
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        request = self.context['request']
+        if self.many:
+            return [self.to_dict(obj, request) for obj in self.instance]
+        return self.to_dict(self.instance, request)
+
+
+class FastRecipeListSerializer(FastSerializer):
+    to_dict = staticmethod(recipe_to_dict)
+
+
+class FastSubscribeSerializer(FastSerializer):
+    to_dict = staticmethod(subscription_to_dict)
@@ -0,0 +1,41 @@
+"""Фоновое дозаполнение лент подписок.
+
+Автор, у которого после отписки стало FEED_FANOUT_MAX_FOLLOWERS
+подписчиков, снова раскладывается при публикации, и лентам всех его
+подписчиков нужны прошлые рецепты. Эти вставки выполняет пул потоков
+после коммита, а не запрос отписки. Если процесс упал раньше, ленты
+чинит rebuild_feeds.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import close_old_connections, transaction
+
+from foodgram.constants import FEED_WORKERS
+from recipes.models import FeedItem
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=FEED_WORKERS, thread_name_prefix='feed-refill'
+)
+
+
+def schedule_refill(author_ids):
+    """Ставит дозаполнение лент авторов в очередь после коммита."""
+    if author_ids:
+        transaction.on_commit(partial(
+            executor.submit, refill_authors, list(author_ids)
+        ))
+
+
+def refill_authors(author_ids):
+    try:
+        # fill пропустит авторов, которые успели снова набрать
+        # подписчиков сверх порога.
+        FeedItem.objects.refill(author_ids)
+    except Exception:
+        logger.exception('Не удалось дозаполнить ленты авторов %s', author_ids)
+    finally:
+        close_old_connections()
@@ -1,18 +1,26 @@
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe
+from foodgram.constants import RECIPE_SCORE_HALF_LIVES
+from recipes.models import Recipe
+from recipes.search import search_recipes
 
 User = get_user_model()
 
 
-class IngredientsSearchFilter(FilterSet):
-    """Фильтр поиска ингредиентов по названию."""
-    name = filters.CharFilter(lookup_expr='istartswith')
+class RecipeOrderingFilter(filters.OrderingFilter):
+    """Сортировка по полям и по рейтингам popular и trending."""
 
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.extra['choices'] += [
+            (ranking, ranking) for ranking in RECIPE_SCORE_HALF_LIVES
+        ]
+
+    def filter(self, queryset, value):
+        if value and value[0] in RECIPE_SCORE_HALF_LIVES:
+            return queryset.ranked(value[0])
+        return super().filter(queryset, value)
 
 
 class RecipeFilter(FilterSet):
@@ -22,10 +30,14 @@ class RecipeFilter(FilterSet):
         method='get_is_in_shopping_cart'
     )
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
+    search = filters.CharFilter(method='get_search')
+    ordering = RecipeOrderingFilter(
+        fields=('favorites_count', 'pub_date')
+    )
 
     class Meta:
         model = Recipe
-        fields = ('author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'is_favorited', 'is_in_shopping_cart', 'search')
 
     def get_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -38,3 +50,6 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
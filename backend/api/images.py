@@ -0,0 +1,124 @@
+"""Фоновая подготовка уменьшенных копий загруженных картинок.
+
+Запрос только сохраняет оригинал; уменьшение и перекодирование
+в WebP и JPEG выполняет пул потоков процесса после коммита транзакции.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import PurePosixPath
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+from api.authentication import token_cache
+from api.response_cache import response_cache
+from foodgram.constants import (IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY,
+                                IMAGE_VARIANT_WIDTHS, IMAGE_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=IMAGE_WORKERS, thread_name_prefix='image-variants'
+)
+
+
+def schedule_variants(instance, field_name, cache_tags=()):
+    """Сбрасывает старые копии и ставит новые в очередь после коммита.
+
+    Файлы старых копий удаляются, когда готовы новые, а если картинку
+    убрали — сразу после коммита.
+    """
+    variants_field = f'{field_name}_variants'
+    model = type(instance)
+    rows = model.objects.filter(pk=instance.pk)
+    old_variants = rows.values_list(variants_field, flat=True).first() or {}
+    rows.update(**{variants_field: {}})
+    setattr(instance, variants_field, {})
+    name = getattr(instance, field_name).name
+    if name:
+        transaction.on_commit(partial(
+            executor.submit, build_variants, model, instance.pk, field_name,
+            name, cache_tags, old_variants
+        ))
+    else:
+        schedule_removal(old_variants)
+
+
+def schedule_removal(variants):
+    """Удаляет файлы копий в фоне после коммита."""
+    if variants:
+        transaction.on_commit(partial(
+            executor.submit, remove_variants, variants
+        ))
+
+
+def remove_variants(variants):
+    for paths in variants.values():
+        for path in paths.values():
+            try:
+                default_storage.delete(path)
+            except Exception:
+                logger.exception('Не удалось удалить копию картинки %s', path)
+
+
+def build_variants(model, pk, field_name, name, cache_tags,
+                   old_variants=None):
+    try:
+        variants = {}
+        with default_storage.open(name) as file:
+            original = Image.open(file)
+            original.load()
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA')
+        path = PurePosixPath(name)
+        for width in IMAGE_VARIANT_WIDTHS:
+            image = original.copy()
+            image.thumbnail((width, width * original.height))
+            for image_format, extension in IMAGE_VARIANT_FORMATS:
+                output = image
+                if image_format == 'JPEG':
+                    output = image.convert('RGB')
+                buffer = io.BytesIO()
+                output.save(
+                    buffer, image_format, quality=IMAGE_VARIANT_QUALITY
+                )
+                variants.setdefault(extension, {})[str(width)] = (
+                    default_storage.save(
+                        str(path.parent / 'variants'
+                            / f'{path.stem}_{width}.{extension}'),
+                        ContentFile(buffer.getvalue())
+                    )
+                )
+        updated = model.objects.filter(
+            pk=pk, **{field_name: name}
+        ).update(**{f'{field_name}_variants': variants})
+        if updated:
+            remove_variants(old_variants or {})
+        else:
+            # Картинку успели заменить или объект удалён: копии не нужны.
+            remove_variants(variants)
+        if updated and cache_tags:
+            response_cache.invalidate(*cache_tags)
+        if updated and model is get_user_model():
+            # Аватар текущего пользователя берётся из кеша токенов.
+            token_cache.invalidate_user(pk)
+    except Exception:
+        logger.exception('Не удалось подготовить копии картинки %s', name)
+    finally:
+        close_old_connections()
+
+
+def get_srcset(request, variants, extension='webp'):
+    """Строка для srcset: «url 320w, url 640w»."""
+    urls = variants.get(extension)
+    if not urls:
+        return None
+    return ', '.join(
+        f'{request.build_absolute_uri(default_storage.url(path))} {width}w'
+        for width, path in sorted(urls.items(), key=lambda x: int(x[0]))
+    )
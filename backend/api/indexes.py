@@ -0,0 +1,336 @@
+"""Индексы в памяти процесса для горячих запросов на чтение."""
+import secrets
+import threading
+import uuid
+from bisect import bisect_left
+from itertools import chain
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from foodgram.constants import (MATCH_INDEX_CHANGE_TTL, MATCH_INDEX_CHUNK_SIZE,
+                                MATCH_INDEX_MAX_LAG)
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+
+class LocalIndex:
+    """Данные, загружаемые из базы один раз на процесс.
+
+    Признак актуальности хранится в общем кеше: после invalidate()
+    каждый процесс перестраивает свою копию при следующем обращении.
+    """
+    generation_key = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._data = None
+
+    def build(self):
+        raise NotImplementedError
+
+    async def abuild(self):
+        return await sync_to_async(self.build)()
+
+    def get(self):
+        generation = cache.get(self.generation_key)
+        data = self._data
+        if data is not None and generation == self._generation:
+            return data
+        with self._lock:
+            if self._data is None or generation != self._generation:
+                self._data = self.build()
+                self._generation = generation
+            return self._data
+
+    async def aget(self):
+        """get() для async-представлений, без блокировки потоков.
+
+        Два одновременных промаха соберут индекс дважды, результат
+        одинаков.
+        """
+        generation = await cache.aget(self.generation_key)
+        if self._data is None or generation != self._generation:
+            self._data = await self.abuild()
+            self._generation = generation
+        return self._data
+
+    def invalidate(self):
+        self._data = None
+        cache.set(self.generation_key, uuid.uuid4().hex, timeout=None)
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска без учёта регистра и «ё»."""
+    return value.strip().casefold().replace('ё', 'е')
+
+
+def parse_limit(value):
+    """Лимит из ?limit=: не меньше 1; без числа — без ограничения."""
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return None
+
+
+class IngredientIndex(LocalIndex):
+    """Отсортированный массив названий ингредиентов для автодополнения."""
+    generation_key = 'ingredient_index:generation'
+
+    def build(self):
+        return self.make_index(Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        ).order_by())
+
+    async def abuild(self):
+        # values(), а не values_list(): aiterator() у ValuesListIterable
+        # выполняет запрос сразу, в асинхронном контексте.
+        return self.make_index([
+            (row['id'], row['name'], row['measurement_unit'])
+            async for row in Ingredient.objects.values(
+                'id', 'name', 'measurement_unit'
+            ).order_by().aiterator()
+        ])
+
+    @staticmethod
+    def make_index(rows):
+        rows = sorted(
+            (normalize(name), {
+                'id': pk, 'name': name, 'measurement_unit': unit
+            })
+            for pk, name, unit in rows
+        )
+        return [key for key, _ in rows], [item for _, item in rows]
+
+    def search(self, query, limit=None):
+        return self.find(self.get(), query, limit)
+
+    async def asearch(self, query, limit=None):
+        return self.find(await self.aget(), query, limit)
+
+    @staticmethod
+    def find(index, query, limit=None):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        keys, items = index
+        query = normalize(query)
+        if not query:
+            return items[:limit]
+        found = []
+        position = bisect_left(keys, query)
+        while (
+            position < len(keys)
+            and keys[position].startswith(query)
+            and len(found) != limit
+        ):
+            found.append(items[position])
+            position += 1
+        for key, item in zip(keys, items):
+            if len(found) == limit:
+                break
+            if query in key and not key.startswith(query):
+                found.append(item)
+        return found
+
+
+ingredient_index = IngredientIndex()
+
+
+class RecipeIdIndex(LocalIndex):
+    """Битовая карта id существующих рецептов для коротких ссылок."""
+    generation_key = 'recipe_id_index:generation'
+
+    def build(self):
+        return self.make_index(list(
+            Recipe.objects.values_list('id', flat=True).order_by()
+        ))
+
+    async def abuild(self):
+        return self.make_index([
+            row['id'] async for row in Recipe.objects.values(
+                'id'
+            ).order_by().aiterator()
+        ])
+
+    @staticmethod
+    def make_index(ids):
+        bitmap = bytearray(max(ids, default=0) // 8 + 1)
+        for pk in ids:
+            bitmap[pk >> 3] |= 1 << (pk & 7)
+        return bytes(bitmap)
+
+    @staticmethod
+    def find(bitmap, pk):
+        return 0 < pk and pk >> 3 < len(bitmap) and bool(
+            bitmap[pk >> 3] & 1 << (pk & 7)
+        )
+
+    def contains(self, pk):
+        return self.find(self.get(), pk)
+
+    async def acontains(self, pk):
+        return self.find(await self.aget(), pk)
+
+
+recipe_ids = RecipeIdIndex()
+
+
+class RecipeMatchIndex(LocalIndex):
+    """Обратный индекс «ингредиент → id рецептов» для подбора по продуктам.
+
+    Пары хранятся одним отсортированным массивом ключей
+    ingredient_id << 32 | recipe_id, поэтому рецепты ингредиента —
+    непрерывный отрезок, который находит searchsorted; sizes[recipe_id] —
+    число ингредиентов рецепта.
+
+    Вместо поколения в общем кеше лежит журнал: номер последнего
+    изменения и под каждым номером пара (id рецепта, его ингредиенты).
+    Процесс применяет недостающие записи к своей копии и собирает индекс
+    заново, только если отстал больше чем на MATCH_INDEX_MAX_LAG
+    записей или запись уже вытеснена.
+    """
+    version_key = 'recipe_match_index:version'
+    change_key = 'recipe_match_index:change:{}'
+
+    def build(self):
+        pairs = np.fromiter(
+            chain.from_iterable(
+                RecipeIngredient.objects.values_list(
+                    'ingredient_id', 'recipe_id'
+                ).order_by().iterator(chunk_size=MATCH_INDEX_CHUNK_SIZE)
+            ),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        return self.make_index(pairs[:, 0], pairs[:, 1])
+
+    @staticmethod
+    def make_index(ingredient_ids, recipe_ids):
+        keys = np.sort(ingredient_ids << 32 | recipe_ids)
+        sizes = np.bincount(recipe_ids).astype(np.int32)
+        return keys, sizes
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is not None:
+            return version
+        # Случайное начало: после очистки кеша номера не совпадут
+        # с теми, до которых процессы уже дошли.
+        cache.add(self.version_key, secrets.randbits(40) << 20, timeout=None)
+        return cache.get(self.version_key)
+
+    def get(self):
+        version = self.get_version()
+        data = self._data
+        if data is not None and version == self._generation:
+            return data
+        with self._lock:
+            if self._data is not None and version != self._generation:
+                self.catch_up(version)
+            if self._data is None or version != self._generation:
+                self._data = self.build()
+                self._generation = version
+            return self._data
+
+    async def aget(self):
+        return await sync_to_async(self.get)()
+
+    def invalidate(self):
+        self._data = None
+        cache.set(self.version_key, secrets.randbits(40) << 20, timeout=None)
+
+    def catch_up(self, version):
+        """Применяет журнал с self._generation до version, если он цел."""
+        lag = version - self._generation
+        if not 0 < lag <= MATCH_INDEX_MAX_LAG:
+            return
+        keys = [
+            self.change_key.format(number)
+            for number in range(self._generation + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return
+        self._data = self.apply_changes(
+            self._data, dict(changes[key] for key in keys)
+        )
+        self._generation = version
+
+    @staticmethod
+    def apply_changes(index, changes):
+        """Новая копия индекса с ингредиентами {recipe_id: [id, ...]}."""
+        keys, sizes = index
+        recipe_ids = np.fromiter(changes, dtype=np.int64)
+        keys = keys[~np.isin(keys & 0xFFFFFFFF, recipe_ids)]
+        added = np.sort(np.fromiter(
+            (
+                ingredient_id << 32 | recipe_id
+                for recipe_id, ingredient_ids in changes.items()
+                for ingredient_id in ingredient_ids
+            ),
+            dtype=np.int64
+        ))
+        keys = np.insert(keys, np.searchsorted(keys, added), added)
+        size = max(len(sizes), int(recipe_ids.max()) + 1)
+        sizes = np.concatenate([
+            sizes, np.zeros(size - len(sizes), dtype=np.int32)
+        ])
+        sizes[recipe_ids] = [
+            len(ingredient_ids) for ingredient_ids in changes.values()
+        ]
+        return keys, sizes
+
+    def publish(self, recipe_id):
+        """Записывает в журнал текущие ингредиенты рецепта.
+
+        Удалённый рецепт записывается с пустым списком.
+        """
+        ingredient_ids = list(RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', flat=True))
+        try:
+            version = cache.incr(self.version_key)
+        except ValueError:
+            # Журнала нет: процессы соберут индекс заново.
+            self.get_version()
+            return
+        cache.set(
+            self.change_key.format(version), (recipe_id, ingredient_ids),
+            MATCH_INDEX_CHANGE_TTL
+        )
+
+    def match(self, ingredient_ids, max_missing=None):
+        return self.find(self.get(), ingredient_ids, max_missing)
+
+    @staticmethod
+    def find(index, ingredient_ids, max_missing=None):
+        """Рецепты хотя бы с одним из ингредиентов, лучшие сверху.
+
+        Возвращает массив записей (id, coverage, missing): доля
+        ингредиентов рецепта, которые есть, и сколько не хватает.
+        Порядок: coverage по убыванию, missing по возрастанию, новые
+        рецепты (больший id) выше.
+        """
+        keys, sizes = index
+        owned = np.unique(np.asarray(ingredient_ids, dtype=np.int64))
+        starts = np.searchsorted(keys, owned << 32)
+        ends = np.searchsorted(keys, (owned + 1) << 32)
+        found = np.concatenate(
+            [keys[start:end] for start, end in zip(starts, ends)]
+            or [keys[:0]]
+        ) & 0xFFFFFFFF
+        recipe_ids, counts = np.unique(found, return_counts=True)
+        missing = sizes[recipe_ids] - counts
+        if max_missing is not None:
+            keep = missing <= max_missing
+            recipe_ids, counts, missing = (
+                recipe_ids[keep], counts[keep], missing[keep]
+            )
+        coverage = counts / sizes[recipe_ids]
+        order = np.lexsort((-recipe_ids, missing, -coverage))
+        return np.rec.fromarrays(
+            [recipe_ids[order], coverage[order], missing[order]],
+            names='id,coverage,missing'
+        )
+
+
+recipe_match_index = RecipeMatchIndex()
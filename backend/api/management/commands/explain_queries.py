@@ -0,0 +1,119 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.models import Ingredient, Recipe, ShoppingListItem
+from users.models import SomeUser
+
+# Полный просмотр: (таблица, индекс). Индекс пуст, если читается
+# сама таблица.
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)()'),
+    'sqlite': re.compile(
+        r'\bSCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?'
+    ),
+}
+SORT_PATTERNS = {
+    'postgresql': re.compile(r'((?:Incremental )?Sort)  \('),
+    'sqlite': re.compile(
+        r'USE TEMP B-TREE FOR ([A-Z ]*?(?:ORDER BY|GROUP BY|DISTINCT))'
+    ),
+}
+INDEX_PATTERNS = {
+    'postgresql': re.compile(r'Index (?:Only )?Scan'),
+    'sqlite': re.compile(r'\bSEARCH \w+ USING'),
+}
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN для запросов API: проверка использования индексов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help=(
+                'Завершиться с ошибкой при полном просмотре или '
+                'сортировке во временной таблице.'
+            )
+        )
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='Печатать план запроса целиком.'
+        )
+
+    def get_query_shapes(self):
+        user = SomeUser.objects.order_by('pk').first() or SomeUser(pk=0)
+        return {
+            'recipes:list': Recipe.objects.with_user_flags(user)[:6],
+            'recipes:popular': Recipe.objects.ranked('popular')[:6],
+            'recipes:trending': Recipe.objects.ranked('trending')[:6],
+            'recipes:similar': Recipe.objects.filter(
+                similar_to__recipe=Recipe.objects.order_by('pk').first()
+            ).order_by('-similar_to__score', '-pk')[:6],
+            'recipes:author': Recipe.objects.with_user_flags(user).filter(
+                author=user
+            )[:6],
+            'recipes:favorited': Recipe.objects.filter(
+                favorites__user=user
+            )[:6],
+            'recipes:in_cart': Recipe.objects.filter(
+                shopping_cart__user=user
+            )[:6],
+            'users:subscriptions': SomeUser.objects.filter(
+                subscribing__user=user
+            )[:6],
+            'recipes:download_shopping_cart': (
+                ShoppingListItem.objects.filter(user=user).values_list(
+                    'ingredient__name', 'ingredient__measurement_unit',
+                    'total'
+                )
+            ),
+            'ingredients:prefix': Ingredient.objects.filter(
+                name__istartswith='а'
+            ),
+        }
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'База {vendor} не поддерживается.')
+        failures = []
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # На маленьких таблицах планировщик выбирает полный
+                # просмотр, даже если подходящий индекс есть.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset in self.get_query_shapes().items():
+                plan = queryset.explain()
+                problems = [
+                    f'сортировка ({sort})'
+                    for sort in SORT_PATTERNS[vendor].findall(plan)
+                ]
+                uses_index = bool(INDEX_PATTERNS[vendor].search(plan))
+                for table, index in FULL_SCAN_PATTERNS[vendor].findall(plan):
+                    if index and queryset.query.high_mark and not problems:
+                        # Обход индекса в порядке ORDER BY без сортировки
+                        # останавливается после LIMIT строк.
+                        uses_index = True
+                    else:
+                        problems.append(f'полный просмотр {index or table}')
+                if not uses_index:
+                    problems.append('без индекса')
+                if problems:
+                    failures.append(name)
+                    self.stdout.write(self.style.WARNING(
+                        f'{name}: {", ".join(problems)}'
+                    ))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{name}: индекс'))
+                if options['verbose_plan']:
+                    self.stdout.write(plan)
+        if failures and options['strict']:
+            raise CommandError(
+                f'Запросы с полным просмотром или сортировкой: '
+                f'{", ".join(failures)}'
+            )
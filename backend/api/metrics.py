@@ -0,0 +1,289 @@
+"""Метрики запросов: SQL, время сериализации и гистограммы по маршрутам.
+
+Данные живут в памяти процесса: каждый воркер gunicorn отдаёт на
+/api/_metrics только свои запросы, суммирует их Prometheus.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.db import connections
+
+from api.authentication import token_cache
+from api.response_cache import response_cache
+from foodgram.constants import (DUPLICATE_QUERY_THRESHOLD,
+                                METRICS_DURATION_BUCKETS, METRICS_WINDOW)
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+SPACES = re.compile(r'\s+')
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def fingerprint(sql):
+    """SQL без значений: запросы, отличающиеся только параметрами, равны."""
+    return SPACES.sub(' ', IN_LIST.sub('IN (...)', sql)).strip()
+
+
+class RequestMetrics:
+    """Замеры одного запроса; ставится в execute_wrapper всех баз."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.fingerprints = Counter()
+        self.serializer_started = None
+        self.serializer_time = None
+        self._sql_at_serializer_start = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def capture(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def start_serializer(self):
+        if self.serializer_started is None:
+            self.serializer_started = time.perf_counter()
+            self._sql_at_serializer_start = self.sql_time
+
+    def stop_serializer(self):
+        """Время от get_serializer до finalize_response без SQL."""
+        if self.serializer_started is not None:
+            self.serializer_time = (
+                time.perf_counter() - self.serializer_started
+                - (self.sql_time - self._sql_at_serializer_start)
+            )
+
+    @property
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count >= DUPLICATE_QUERY_THRESHOLD
+        }
+
+    def server_timing(self, duration):
+        timings = [
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        if self.serializer_time is not None:
+            timings.append(f'serializer;dur={self.serializer_time * 1000:.1f}')
+        duplicates = sum(self.duplicates.values())
+        if duplicates:
+            timings.append(f'dup;desc="{duplicates} duplicate queries"')
+        return ', '.join(timings)
+
+
+class RouteStats:
+    def __init__(self):
+        self.buckets = [0] * len(METRICS_DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.duplicates = 0
+        self.serializer_time = 0.0
+        self.window = deque(maxlen=METRICS_WINDOW)
+
+
+class MetricsRegistry:
+    """Гистограмма длительности и суммарные счётчики по маршрутам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteStats)
+
+    def observe(self, route, method, status, duration, metrics):
+        with self._lock:
+            stats = self._routes[route, method, status // 100]
+            for index, bound in enumerate(METRICS_DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+            stats.count += 1
+            stats.duration += duration
+            stats.queries += metrics.queries
+            stats.sql_time += metrics.sql_time
+            stats.duplicates += sum(metrics.duplicates.values())
+            stats.serializer_time += metrics.serializer_time or 0
+            stats.window.append(duration)
+
+    def render(self):
+        """Текстовый формат Prometheus 0.0.4."""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f'# HELP foodgram_{name} {help_text}')
+            lines.append(f'# TYPE foodgram_{name} {kind}')
+
+        def sample(name, labels, value):
+            text = ','.join(f'{key}="{label}"' for key, label in labels)
+            if isinstance(value, float):
+                value = f'{value:.6f}'
+            lines.append(f'foodgram_{name}{{{text}}} {value}')
+
+        with self._lock:
+            routes = [
+                (
+                    (('route', route), ('method', method),
+                     ('status', f'{status}xx')),
+                    stats
+                )
+                for (route, method, status), stats in sorted(
+                    self._routes.items()
+                )
+            ]
+            metric(
+                'request_duration_seconds', 'histogram',
+                'Длительность запроса.'
+            )
+            for labels, stats in routes:
+                for bound, count in zip(
+                    METRICS_DURATION_BUCKETS, stats.buckets
+                ):
+                    sample(
+                        'request_duration_seconds_bucket',
+                        (*labels, ('le', bound)), count
+                    )
+                sample(
+                    'request_duration_seconds_bucket',
+                    (*labels, ('le', '+Inf')), stats.count
+                )
+                sample('request_duration_seconds_sum', labels, stats.duration)
+                sample('request_duration_seconds_count', labels, stats.count)
+            metric(
+                'request_duration_window_seconds', 'summary',
+                f'Длительность последних {METRICS_WINDOW} запросов.'
+            )
+            for labels, stats in routes:
+                window = sorted(stats.window)
+                for quantile in QUANTILES:
+                    sample(
+                        'request_duration_window_seconds',
+                        (*labels, ('quantile', quantile)),
+                        window[min(
+                            len(window) - 1, int(len(window) * quantile)
+                        )]
+                    )
+            for name, attribute, help_text in (
+                ('queries_total', 'queries', 'SQL-запросы.'),
+                ('sql_seconds_total', 'sql_time', 'Время в SQL.'),
+                (
+                    'duplicate_queries_total', 'duplicates',
+                    'Повторы одного и того же SQL в запросе (N+1).'
+                ),
+                (
+                    'serializer_seconds_total', 'serializer_time',
+                    'Время сериализации без SQL.'
+                ),
+            ):
+                metric(f'request_{name}', 'counter', help_text)
+                for labels, stats in routes:
+                    sample(
+                        f'request_{name}', labels, getattr(stats, attribute)
+                    )
+        for name, value in response_cache.stats().items():
+            metric(
+                f'response_cache_{name}_total', 'counter',
+                'Обращения к кешу ответов API.'
+            )
+            sample(f'response_cache_{name}_total', (), value)
+        metric(
+            'auth_token_cache_total', 'counter',
+            'Аутентификация по токену: попадания в кеши и промахи.'
+        )
+        for result in ('local_hits', 'shared_hits', 'misses'):
+            sample(
+                'auth_token_cache_total', (('result', result),),
+                token_cache.stats[result]
+            )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_route(request, view_func):
+    """Имя маршрута: класс вьюсета и действие или имя функции."""
+    actions = getattr(view_func, 'actions', None)
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is not None:
+        action = (actions or {}).get(request.method.lower(), 'dispatch')
+        return f'{view_class.__name__}.{action}'
+    return getattr(view_func, '__name__', 'unknown')
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL и время каждого запроса.
+
+    Отдаёт результат в заголовке Server-Timing и строкой JSON в лог
+    api.metrics, копит гистограммы для /api/_metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.request_metrics = metrics
+        with metrics.capture():
+            response = self.get_response(request)
+        duration = time.perf_counter() - metrics.started
+        route = metrics.route or 'unresolved'
+        response['Server-Timing'] = metrics.server_timing(duration)
+        registry.observe(
+            route, request.method, response.status_code, duration, metrics
+        )
+        logger.info(json.dumps({
+            'route': route,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'serializer_ms': (
+                round(metrics.serializer_time * 1000, 2)
+                if metrics.serializer_time is not None else None
+            ),
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in metrics.duplicates.items()
+            ],
+        }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.request_metrics.route = get_route(request, view_func)
+
+
+class SerializerTimingMixin:
+    """Отмечает для RequestMetricsMiddleware начало и конец сериализации."""
+
+    def get_serializer(self, *args, **kwargs):
+        metrics = getattr(self.request, 'request_metrics', None)
+        if metrics is not None:
+            metrics.start_serializer()
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = getattr(request, 'request_metrics', None)
+        if metrics is not None:
+            metrics.stop_serializer()
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,8 +1,226 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from foodgram.constants import PAGE_SIZE
+from foodgram.constants import PAGE_SIZE, PAGINATION_COUNT_CACHE_TIMEOUT
+from recipes.models import FeedItem, Recipe
 
 
 class LimitPagination(PageNumberPagination):
+    """Постраничная выдача с необязательным режимом курсора.
+
+    По умолчанию работают параметры page и limit. Если в запросе есть
+    cursor (для первой страницы пустой), выборка идёт по ключу
+    cursor_ordering вью без OFFSET и COUNT(*); общее количество
+    считается только по with_count и кешируется.
+    """
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    cursor_ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+    cursor_ordering_message = (
+        'Курсор нельзя сочетать с другой сортировкой или поиском.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = self.get_cached_count(queryset)
+        queryset, page_size = self.prepare_cursor_page(
+            queryset, request, view
+        )
+        return self.set_cursor_page(
+            list(queryset[:page_size + 1]), page_size
+        )
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же, что paginate_queryset, через асинхронный ORM."""
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            self.count = None
+            if request.query_params.get(self.count_query_param):
+                key = self.get_count_key(queryset)
+                self.count = await cache.aget(key)
+                if self.count is None:
+                    self.count = await queryset.acount()
+                    await cache.aset(
+                        key, self.count, PAGINATION_COUNT_CACHE_TIMEOUT
+                    )
+            queryset, page_size = self.prepare_cursor_page(
+                queryset, request, view
+            )
+            return self.set_cursor_page([
+                obj async for obj in queryset[:page_size + 1].aiterator(
+                    chunk_size=page_size + 1
+                )
+            ], page_size)
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        bottom = (number - 1) * page_size
+        self.page = Page([
+            obj async for obj in queryset[bottom:bottom + page_size].aiterator(
+                chunk_size=page_size
+            )
+        ], number, paginator)
+        self.request = request
+        return list(self.page)
+
+    def prepare_cursor_page(self, queryset, request, view):
+        self.request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.cursor_ordering)
+        ordering = tuple(queryset.query.order_by)
+        if ordering != self.ordering[:len(ordering)]:
+            raise ValidationError(
+                {self.cursor_query_param: [self.cursor_ordering_message]}
+            )
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(
+                self.decode_cursor(cursor, queryset.model)
+            ))
+        return queryset.order_by(*self.ordering), self.get_page_size(request)
+
+    def set_cursor_page(self, page, page_size):
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_keyset_filter(self, values):
+        keyset_filter = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset_filter |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return keyset_filter
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """Значения ключа из курсора, приведённые к типам полей model."""
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        decoded = []
+        for field_name, value in zip(self.ordering, values):
+            field = model._meta.get_field(field_name.lstrip('-'))
+            if not isinstance(value, (str, int)) or isinstance(value, bool):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                value = field.to_python(value)
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            decoded.append(value)
+        return decoded
+
+    def get_count_key(self, queryset):
+        return 'pagination:count:' + hashlib.md5(
+            str(queryset.query).encode()
+        ).hexdigest()
+
+    def get_cached_count(self, queryset):
+        key = self.get_count_key(queryset)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = None
+        response['results'] = data
+        return Response(response)
+
+
+class MatchPagination(LimitPagination):
+    """page и limit по готовому списку из RecipeMatchIndex.find."""
+
+    def paginate_match(self, matches, user, request):
+        self.use_cursor = False
+        page = PageNumberPagination.paginate_queryset(self, matches, request)
+        recipes = Recipe.objects.with_user_flags(user).in_bulk(
+            [int(row.id) for row in page]
+        )
+        result = []
+        for row in page:
+            recipe = recipes.get(int(row.id))
+            if recipe is not None:
+                recipe.coverage = round(float(row.coverage), 4)
+                recipe.missing = int(row.missing)
+                result.append(recipe)
+        return result
+
+
+class FeedPagination(LimitPagination):
+    """Лента подписок листается только курсором.
+
+    Страница склеивается из FeedItem и рецептов популярных авторов
+    (FeedItemQuerySet.page), OFFSET и COUNT(*) по ней не считаются.
+    """
+
+    def paginate_feed(self, user, request):
+        self.use_cursor = True
+        self.count = None
+        self.request = request
+        self.ordering = self.cursor_ordering
+        cursor = request.query_params.get(self.cursor_query_param)
+        page_size = self.get_page_size(request)
+        ids = FeedItem.objects.page(
+            user.pk, page_size + 1,
+            self.decode_cursor(cursor, Recipe) if cursor else None
+        )
+        recipes = Recipe.objects.with_user_flags(user).in_bulk(ids)
+        return self.set_cursor_page(
+            [recipes[pk] for pk in ids if pk in recipes], page_size
+        )
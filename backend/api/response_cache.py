@@ -0,0 +1,95 @@
+"""Кеш ответов API для анонимных GET-запросов с инвалидацией по тегам.
+
+Запись хранит версии своих тегов на момент сохранения. Инвалидация
+удаляет версию тега, после чего все записи с этим тегом считаются
+промахом.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from foodgram.constants import RESPONSE_CACHE_TIMEOUT
+
+TAG_KEY = 'response_cache:tag:{}'
+ENTRY_KEY = 'response_cache:entry:{}'
+STATS_KEY = 'response_cache:{}'
+
+
+class ResponseCache:
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, request):
+        query = '&'.join(
+            f'{name}={value}'
+            for name, values in sorted(request.query_params.lists())
+            for value in sorted(values)
+        )
+        raw = f'{request.get_host()}{request.path}?{query}'
+        return ENTRY_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+    def get_versions(self, tags):
+        keys = {TAG_KEY.format(tag): tag for tag in tags}
+        versions = self.cache.get_many(keys)
+        missing = {
+            key: uuid.uuid4().hex for key in keys if key not in versions
+        }
+        for key, version in missing.items():
+            if not self.cache.add(key, version, timeout=None):
+                version = self.cache.get(key)
+            versions[key] = version
+        return {keys[key]: version for key, version in versions.items()}
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is not None:
+            data, versions = entry
+            current = self.cache.get_many(
+                [TAG_KEY.format(tag) for tag in versions]
+            )
+            if all(
+                current.get(TAG_KEY.format(tag)) == version
+                for tag, version in versions.items()
+            ):
+                self._count('hits')
+                return data
+        self._count('misses')
+        return None
+
+    def set(self, key, data, tags, versions=None):
+        """Сохраняет ответ.
+
+        versions — версии тегов, снятые до формирования ответа: так
+        инвалидация во время рендера не оставит в кеше старые данные.
+        """
+        versions = {**self.get_versions(tags), **(versions or {})}
+        self.cache.set(key, (data, versions), self.timeout)
+
+    def invalidate(self, *tags):
+        self.cache.delete_many([TAG_KEY.format(tag) for tag in tags])
+
+    def _count(self, name):
+        key = STATS_KEY.format(name)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self):
+        keys = {STATS_KEY.format(name): name for name in ('hits', 'misses')}
+        values = self.cache.get_many(keys)
+        return {name: values.get(key, 0) for key, name in keys.items()}
+
+
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_ALIAS, RESPONSE_CACHE_TIMEOUT
+)
@@ -1,4 +1,5 @@
 import base64
+import binascii
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
@@ -6,40 +7,66 @@ from django.db import transaction
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
 
-from recipes.models import Ingredient, Recipe, RecipeIngredient
+from api.images import get_srcset, schedule_variants
+from foodgram.constants import (ALLOWED_IMAGE_TYPES, BULK_MAX_IDS,
+                                MATCH_MAX_INGREDIENT_ID, MATCH_MAX_INGREDIENTS,
+                                MAX_IMAGE_SIZE)
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingListItem)
 
 User = get_user_model()
 
 
 class Base64Image(serializers.ImageField):
+    """Картинка в base64.
+
+    Тип и размер проверяются до декодирования, уменьшенные копии
+    готовятся в фоне (см. api.images).
+    """
+    default_error_messages = {
+        'image_type': 'Недопустимый формат изображения.',
+        'image_size': 'Размер изображения превышает допустимый.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            header, encoded_str = data.split(';base64,')
-            file_ext = header.split('/')[-1]
-            data = ContentFile(
-                base64.b64decode(encoded_str),
-                name=f'temp.{file_ext}'
-            )
+            header, _, encoded_str = data.partition(';base64,')
+            file_ext = header.split('/')[-1].lower()
+            if file_ext not in ALLOWED_IMAGE_TYPES:
+                self.fail('image_type')
+            if len(encoded_str) * 3 // 4 > MAX_IMAGE_SIZE:
+                self.fail('image_size')
+            try:
+                content = base64.b64decode(encoded_str, validate=True)
+            except binascii.Error:
+                self.fail('invalid_image')
+            data = ContentFile(content, name=f'temp.{file_ext}')
         return super().to_internal_value(data)
 
 
 class UserSerializer(DjoserUserSerializer):
     """Сериализатор пользователя с доп. полем подписки."""
     is_subscribed = serializers.SerializerMethodField()
+    avatar_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name',
-            'last_name', 'is_subscribed', 'avatar'
+            'last_name', 'is_subscribed', 'avatar', 'avatar_srcset'
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         current_user = self.context.get('request').user
         if current_user.is_anonymous:
             return False
         return obj.subscribing.filter(user=current_user).exists()
 
+    def get_avatar_srcset(self, obj):
+        return get_srcset(self.context.get('request'), obj.avatar_variants)
+
 
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64Image()
@@ -48,6 +75,11 @@ class AvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ('avatar',)
 
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        schedule_variants(instance, 'avatar', [f'author:{instance.pk}'])
+        return instance
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -68,6 +100,20 @@ class RecipeIngredientsReaderSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Позиция списка покупок."""
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+    amount = serializers.ReadOnlyField(source='total')
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class RecipeListSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения списка рецептов."""
     author = UserSerializer(read_only=True)
@@ -75,6 +121,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
         source='recipe_ingredients', many=True
     )
     image = Base64Image()
+    image_srcset = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -82,23 +129,65 @@ class RecipeListSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = (
             'id', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text',
+            'is_in_shopping_cart', 'name', 'image', 'image_srcset', 'text',
             'cooking_time'
         )
 
+    def get_image_srcset(self, obj):
+        return get_srcset(self.context.get('request'), obj.image_variants)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return user.favorites.filter(recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
         return user.shopping_cart.filter(recipe=obj).exists()
 
 
+class RecipeMatchSerializer(RecipeListSerializer):
+    """Рецепт в подборе по ингредиентам: доля имеющихся и недостающие."""
+    coverage = serializers.FloatField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeListSerializer.Meta):
+        fields = RecipeListSerializer.Meta.fields + ('coverage', 'missing')
+
+
+class RecipeMatchQuerySerializer(serializers.Serializer):
+    """Параметры подбора: id ингредиентов через запятую."""
+    ingredients = serializers.CharField()
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_ingredients(self, value):
+        try:
+            ids = [int(part) for part in value.split(',') if part.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id ингредиентов через запятую.'
+            )
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError('Укажите хотя бы один id.')
+        if not all(1 <= pk <= MATCH_MAX_INGREDIENT_ID for pk in ids):
+            raise serializers.ValidationError(
+                f'id ингредиента — число от 1 до {MATCH_MAX_INGREDIENT_ID}.'
+            )
+        if len(ids) > MATCH_MAX_INGREDIENTS:
+            raise serializers.ValidationError(
+                f'Не больше {MATCH_MAX_INGREDIENTS} ингредиентов.'
+            )
+        return ids
+
+
 class RecipeCreatingSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и обновления рецепта."""
     ingredients = serializers.ListField()
@@ -114,12 +203,20 @@ class RecipeCreatingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'ingredients': 'Список ингредиентов не может быть пустым.'}
             )
+        try:
+            found_ids = {str(pk) for pk in Ingredient.objects.filter(
+                id__in={item.get('id') for item in ingredients_data}
+            ).values_list('id', flat=True)}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(
+                {'ingredients': 'Некорректный id ингредиента.'}
+            )
         unique_ids = set()
         for item in ingredients_data:
             ing_id = item.get('id')
             amount = item.get('amount')
 
-            if not Ingredient.objects.filter(id=ing_id).exists():
+            if str(ing_id) not in found_ids:
                 raise serializers.ValidationError(
                     {'ingredients': f'Ингредиент с id={ing_id} не найден.'}
                 )
@@ -153,19 +250,64 @@ class RecipeCreatingSerializer(serializers.ModelSerializer):
             )
         RecipeIngredient.objects.bulk_create(records)
 
+    def update_ingredients(self, ingredients_list, recipe):
+        """Меняет только отличающиеся строки ингредиентов рецепта."""
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        wanted = {
+            int(item['id']): int(item['amount']) for item in ingredients_list
+        }
+        # Удалённые строки вычитает из списков покупок приёмник
+        # post_delete, изменённые и новые — change_recipe ниже.
+        deltas = {
+            ingredient_id: amount - (
+                current[ingredient_id].amount if ingredient_id in current
+                else 0
+            )
+            for ingredient_id, amount in wanted.items()
+        }
+        removed = current.keys() - wanted.keys()
+        if removed:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = wanted.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in wanted.items()
+            if ingredient_id not in current
+        ])
+        ShoppingListItem.objects.change_recipe(recipe.pk, deltas)
+
     @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
         self.save_ingredients(ingredients, recipe)
+        schedule_variants(
+            recipe, 'image', ['recipes:list', f'recipe:{recipe.pk}']
+        )
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self.save_ingredients(ingredients, instance)
+        self.update_ingredients(ingredients, instance)
+        if 'image' in validated_data:
+            schedule_variants(
+                instance, 'image', ['recipes:list', f'recipe:{instance.pk}']
+            )
         return instance
 
     def to_representation(self, instance):
@@ -175,30 +317,34 @@ class RecipeCreatingSerializer(serializers.ModelSerializer):
 class RecipeMiniSerializer(serializers.ModelSerializer):
     """Укороченный рецепт."""
     image = Base64Image()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_srcset', 'cooking_time')
+
+    def get_image_srcset(self, obj):
+        return get_srcset(self.context.get('request'), obj.image_variants)
 
 
 class SubscribeSerializer(UserSerializer):
     """Сериализатор выдачи подписок."""
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name',
             'last_name', 'is_subscribed', 'recipes', 'recipes_count',
-            'avatar'
+            'avatar', 'avatar_srcset'
         )
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_recipes(self, obj):
         request = self.context.get('request')
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeMiniSerializer(
+                obj.limited_recipes, many=True, context={'request': request}
+            ).data
         limit = request.GET.get('recipes_limit')
         queryset = obj.recipes.all()
         if limit:
@@ -209,3 +355,15 @@ class SubscribeSerializer(UserSerializer):
         return RecipeMiniSerializer(
             queryset, many=True, context={'request': request}
         ).data
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """Список id для пакетных операций."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_IDS
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
@@ -0,0 +1,112 @@
+"""Сборка и выгрузка списка покупок."""
+import csv
+import io
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from foodgram.constants import (SHOPPING_CART_CACHE_TIMEOUT,
+                                SHOPPING_LIST_CHUNK_SIZE)
+from recipes.models import ShoppingListItem
+
+TITLE = 'Ваш список покупок Foodgram:'
+VERSION_KEY = 'shopping_cart:version:{user_id}'
+ITEMS_KEY = 'shopping_cart:items:{user_id}:{version}'
+
+
+def get_cart_version(user_id):
+    """Текущая версия корзины пользователя.
+
+    Начальное значение берётся из часов, чтобы после потери кеша
+    версия не совпала с ETag, выданным ранее.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+    return version
+
+
+def bump_cart_version(*user_ids):
+    """Помечает списки покупок пользователей устаревшими."""
+    for user_id in user_ids:
+        try:
+            cache.incr(VERSION_KEY.format(user_id=user_id))
+        except ValueError:
+            get_cart_version(user_id)
+
+
+def iter_cart_items(user_id, version):
+    """Кортежи (название, единица, количество) для списка покупок.
+
+    Суммы берутся из ShoppingListItem. При промахе кеша строки
+    читаются курсором и сохраняются
+    под ключом версии корзины после полного прохода.
+    """
+    key = ITEMS_KEY.format(user_id=user_id, version=version)
+    items = cache.get(key)
+    if items is not None:
+        yield from items
+        return
+    items = []
+    queryset = ShoppingListItem.objects.filter(user_id=user_id).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'total'
+    ).order_by('ingredient__name')
+    for item in queryset.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE):
+        items.append(item)
+        yield item
+    cache.set(key, items, SHOPPING_CART_CACHE_TIMEOUT)
+
+
+def render_txt(items):
+    yield TITLE
+    for name, unit, amount in items:
+        yield f'\n• {name} ({unit}) — {amount}'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(items):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(('Ингредиент', 'Единица измерения', 'Количество'))
+    for item in items:
+        yield writer.writerow(item)
+
+
+def render_pdf(items):
+    font = 'ShoppingListFont'
+    if font not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(font, settings.SHOPPING_LIST_PDF_FONT))
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    top = height - 50
+    pdf.setFont(font, 16)
+    pdf.drawString(50, top, TITLE)
+    y = top - 30
+    for name, unit, amount in items:
+        if y < 50:
+            pdf.showPage()
+            y = top
+        pdf.setFont(font, 12)
+        pdf.drawString(50, y, f'• {name} ({unit}) — {amount}')
+        y -= 20
+    pdf.save()
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(SHOPPING_LIST_CHUNK_SIZE), b'')
+
+
+EXPORTERS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'pdf': (render_pdf, 'application/pdf'),
+}
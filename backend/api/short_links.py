@@ -0,0 +1,128 @@
+"""Короткие ссылки на рецепты: коды base62 и буферизованный счёт переходов.
+
+Код — id рецепта, перемешанный умножением по модулю и записанный
+в base62. Первый символ всегда буква, поэтому старые ссылки /s/<id>/
+из одних цифр с кодами не пересекаются.
+"""
+import atexit
+import logging
+import string
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+
+from foodgram.constants import (SHORT_LINK_CLICKS_FLUSH_INTERVAL,
+                                SHORT_LINK_CLICKS_FLUSH_SIZE,
+                                SHORT_LINK_MODULUS, SHORT_LINK_MULTIPLIER)
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+LETTERS = string.ascii_letters
+ALPHABET = string.digits + LETTERS
+POSITIONS = {char: position for position, char in enumerate(ALPHABET)}
+INVERSE = pow(SHORT_LINK_MULTIPLIER, -1, SHORT_LINK_MODULUS)
+
+
+def encode_number(number):
+    """Первая цифра — буква (основание 52), остальные — base62."""
+    number, first = divmod(number, len(LETTERS))
+    code = [LETTERS[first]]
+    while number:
+        number, digit = divmod(number, len(ALPHABET))
+        code.append(ALPHABET[digit])
+    return ''.join(code)
+
+
+def encode(pk):
+    return encode_number(pk * SHORT_LINK_MULTIPLIER % SHORT_LINK_MODULUS)
+
+
+def decode(code):
+    """id рецепта по коду или None для строки, которая не код."""
+    if not code or code[0] not in LETTERS:
+        return None
+    number = 0
+    for char in reversed(code[1:]):
+        if char not in POSITIONS:
+            return None
+        number = number * len(ALPHABET) + POSITIONS[char]
+    number = number * len(LETTERS) + LETTERS.index(code[0])
+    # Хвост из нулей даёт то же число: такой код не выдавался.
+    if number >= SHORT_LINK_MODULUS or encode_number(number) != code:
+        return None
+    return number * INVERSE % SHORT_LINK_MODULUS or None
+
+
+class ClickBuffer:
+    """Переходы копятся в памяти и пишутся одним UPDATE.
+
+    Запись уходит в фоновый поток, когда в буфере набралось
+    SHORT_LINK_CLICKS_FLUSH_SIZE переходов или с прошлой записи прошло
+    SHORT_LINK_CLICKS_FLUSH_INTERVAL секунд, и при остановке процесса.
+    """
+
+    def __init__(self, size, interval):
+        self.size = size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.reset()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='short-link-clicks'
+        )
+
+    def add(self, pk):
+        with self._lock:
+            self._counts[pk] += 1
+            self._total += 1
+            due = (
+                self._total >= self.size
+                or time.monotonic() - self._flushed_at >= self.interval
+            )
+            if not due:
+                return
+            counts = self._counts
+            self.reset()
+        self._executor.submit(self.write, counts)
+
+    def reset(self):
+        self._counts = Counter()
+        self._total = 0
+        self._flushed_at = time.monotonic()
+
+    def flush(self):
+        """Пишет буфер сразу, в текущем потоке."""
+        with self._lock:
+            counts = self._counts
+            self.reset()
+        self.write(counts, close_connections=False)
+
+    @staticmethod
+    def write(counts, close_connections=True):
+        if not counts:
+            return
+        try:
+            Recipe.objects.filter(pk__in=counts).update(
+                short_link_clicks=F('short_link_clicks') + Case(
+                    *(
+                        When(pk=pk, then=Value(count))
+                        for pk, count in counts.items()
+                    ),
+                    default=Value(0)
+                )
+            )
+        except Exception:
+            logger.exception('Не удалось записать переходы по ссылкам')
+        finally:
+            if close_connections:
+                close_old_connections()
+
+
+clicks = ClickBuffer(
+    SHORT_LINK_CLICKS_FLUSH_SIZE, SHORT_LINK_CLICKS_FLUSH_INTERVAL
+)
+atexit.register(clicks.flush)
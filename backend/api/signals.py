@@ -0,0 +1,203 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.images import schedule_removal
+from api.indexes import ingredient_index, recipe_ids, recipe_match_index
+from api.response_cache import response_cache
+from api.shopping_list import bump_cart_version
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeScore, ShoppingCart, ShoppingListItem)
+from users.models import SomeUser
+
+
+def _bump_carts(*user_ids):
+    transaction.on_commit(partial(bump_cart_version, *user_ids))
+
+
+def _bump_carts_with(**lookup):
+    _bump_carts(*ShoppingCart.objects.filter(
+        **lookup
+    ).values_list('user_id', flat=True).distinct())
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    _bump_carts(instance.user_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_list_cart_deleted(sender, instance, origin=None, **kwargs):
+    # Список удаляемого пользователя удаляется вместе с ним.
+    if isinstance(origin, SomeUser) and origin.pk == instance.user_id:
+        return
+    ShoppingListItem.objects.remove_recipes(
+        instance.user_id, [instance.recipe_id]
+    )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def shopping_list_ingredient_saving(sender, instance, raw=False, **kwargs):
+    # Прежние ингредиент и количество — для разницы в post_save.
+    instance._stored = None if raw or instance.pk is None else (
+        RecipeIngredient.objects.filter(pk=instance.pk).values_list(
+            'ingredient_id', 'amount'
+        ).first()
+    )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def shopping_list_ingredient_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {instance.ingredient_id: instance.amount}
+    if instance._stored is not None:
+        ingredient_id, amount = instance._stored
+        deltas[ingredient_id] = deltas.get(ingredient_id, 0) - amount
+    ShoppingListItem.objects.change_recipe(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def shopping_list_ingredient_deleted(sender, instance, origin=None,
+                                     **kwargs):
+    # Вклад пары (строка корзины, строка ингредиента) вычитается, когда
+    # удаляется первая из двух строк: приёмники смотрят на оставшиеся
+    # строки, поэтому при каскадном удалении ничего не вычитается
+    # дважды. Позиции удаляемого ингредиента удаляются вместе с ним.
+    if not isinstance(origin, Ingredient):
+        ShoppingListItem.objects.change_recipe(
+            instance.recipe_id, {instance.ingredient_id: -instance.amount}
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def score_event_deleted(sender, instance, origin=None, **kwargs):
+    # Рейтинг удаляемого рецепта удаляется вместе с ним.
+    if not isinstance(origin, Recipe):
+        RecipeScore.objects.retract(
+            sender, instance.recipe_id, instance.created
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_score_created(sender, instance, created, raw=False, **kwargs):
+    # Без строки рейтинга рецепт выпал бы из сортировок popular и trending.
+    if created and not raw:
+        RecipeScore.objects.get_or_create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    if not created:
+        _bump_carts_with(recipe=instance)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    _bump_carts_with(recipe_id=instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        _bump_carts_with(recipe__recipe_ingredients__ingredient=instance)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_index_changed(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_id_created(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(recipe_ids.invalidate)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_id_deleted(sender, **kwargs):
+    transaction.on_commit(recipe_ids.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_match_changed(sender, instance, **kwargs):
+    # Ингредиенты нового рецепта сохраняются после него, поэтому
+    # в журнал индекса рецепт пишется после коммита.
+    transaction.on_commit(partial(recipe_match_index.publish, instance.pk))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_match_changed(sender, instance, origin=None,
+                                    **kwargs):
+    if not isinstance(origin, Recipe):
+        transaction.on_commit(
+            partial(recipe_match_index.publish, instance.recipe_id)
+        )
+
+
+def _invalidate_responses(*tags):
+    transaction.on_commit(partial(response_cache.invalidate, *tags))
+
+
+def _invalidate_recipes(*recipe_ids):
+    _invalidate_responses(
+        'recipes:list', *(f'recipe:{pk}' for pk in recipe_ids)
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_response_changed(sender, instance, **kwargs):
+    _invalidate_recipes(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_response_changed(sender, instance, **kwargs):
+    _invalidate_recipes(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_response_changed(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_recipes(*RecipeIngredient.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True))
+
+
+@receiver((post_save, post_delete), sender=SomeUser)
+def author_response_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    _invalidate_responses(f'author:{instance.pk}')
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Сразу, чтобы выход действовал уже на следующий запрос, и после
+    # коммита, чтобы не осталась копия, прочитанная до него.
+    token_cache.invalidate(instance.key)
+    transaction.on_commit(partial(token_cache.invalidate, instance.key))
+
+
+@receiver((post_save, post_delete), sender=SomeUser)
+def user_token_changed(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    transaction.on_commit(partial(token_cache.invalidate_user, instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(sender, instance, **kwargs):
+    schedule_removal(instance.image_variants)
+
+
+@receiver(pre_delete, sender=SomeUser)
+def user_avatar_deleted(sender, instance, **kwargs):
+    # Удаляемый request.user может быть копией из кеша токенов.
+    schedule_removal(SomeUser.objects.filter(pk=instance.pk).values_list(
+        'avatar_variants', flat=True
+    ).first() or {})
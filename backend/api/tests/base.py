@@ -0,0 +1,59 @@
+from django.core.cache import caches
+from django.db.models import F
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.indexes import ingredient_index, recipe_ids, recipe_match_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import SomeUser
+
+
+class FoodgramTestMixin:
+    """Общие данные и клиенты для тестов API."""
+
+    def setUp(self):
+        super().setUp()
+        for cache in caches.all():
+            cache.clear()
+        for index in (ingredient_index, recipe_ids, recipe_match_index):
+            index.invalidate()
+
+    @staticmethod
+    def create_ingredients(count):
+        return Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(count)
+        )
+
+    @staticmethod
+    def create_user(name):
+        return SomeUser.objects.create_user(
+            username=name, email=f'{name}@example.com',
+            password='Pass-12345', first_name=name, last_name=name
+        )
+
+    @staticmethod
+    def create_recipe(author, ingredients, name='Рецепт'):
+        """Рецепт с ингредиентами; количество — порядковый номер."""
+        recipe = Recipe.objects.create(
+            author=author, name=name, text='Описание', cooking_time=10,
+            image='recipes/images/test.png'
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=number
+            )
+            for number, ingredient in enumerate(ingredients, start=1)
+        )
+        SomeUser.objects.filter(pk=author.pk).update(
+            recipes_count=F('recipes_count') + 1
+        )
+        return recipe
+
+    @staticmethod
+    def client_for(user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.authentication import token_cache
+from api.tests.base import FoodgramTestMixin
+from api.tests.test_images import PNG
+from users.models import SomeUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class TokenCacheLogoutTest(FoodgramTestMixin, APITestCase):
+    """После выхода закешированный токен больше не действует."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('reader')
+        self.client = self.client_for(self.user)
+
+    def assert_logout_rejects_token(self):
+        hits = token_cache.stats['local_hits']
+        for _ in range(2):
+            response = self.client.get('/api/users/me/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(token_cache.stats['local_hits'], hits)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        for path in ('/api/users/me/', '/api/recipes/'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(
+                    response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
+
+    def test_logout(self):
+        self.assert_logout_rejects_token()
+
+    def test_logout_with_shared_cache(self):
+        with mock.patch.object(token_cache, 'alias', 'default'):
+            self.assert_logout_rejects_token()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class StaleCachedUserTest(FoodgramTestMixin, APITestCase):
+    """Сохранение пользователя не затирает то, чего нет в кеше токенов."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('reader')
+        self.client = self.client_for(self.user)
+
+    def assert_keeps_newer_fields(self, method, path, data, code):
+        for _ in range(2):
+            self.client.get('/api/users/me/')
+        # Изменение из другого процесса: сигналы здесь не сработают,
+        # и в локальном кеше остаётся старая копия.
+        SomeUser.objects.filter(pk=self.user.pk).update(
+            first_name='Другое', recipes_count=3
+        )
+        self.assertEqual(token_cache.get(
+            Token.objects.get(user=self.user).key
+        )[0].first_name, 'reader')
+        response = getattr(self.client, method)(path, data, format='json')
+        self.assertEqual(response.status_code, code)
+        user = SomeUser.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, 'Другое')
+        self.assertEqual(user.recipes_count, 3)
+
+    def test_avatar_put(self):
+        self.assert_keeps_newer_fields(
+            'put', '/api/users/me/avatar/', {'avatar': PNG},
+            status.HTTP_200_OK
+        )
+
+    def test_avatar_delete(self):
+        SomeUser.objects.filter(pk=self.user.pk).update(
+            avatar='users/avatars/test.png'
+        )
+        self.assert_keeps_newer_fields(
+            'delete', '/api/users/me/avatar/', None,
+            status.HTTP_204_NO_CONTENT
+        )
+
+    def test_set_password(self):
+        self.assert_keeps_newer_fields(
+            'post', '/api/users/set_password/',
+            {'current_password': 'Pass-12345', 'new_password': 'Pass-67890'},
+            status.HTTP_204_NO_CONTENT
+        )
+        self.assertTrue(
+            SomeUser.objects.get(pk=self.user.pk).check_password('Pass-67890')
+        )
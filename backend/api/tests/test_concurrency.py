@@ -0,0 +1,113 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.test import TransactionTestCase
+from rest_framework import status
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import (Favorite, Recipe, RecipeIngredient, ShoppingCart,
+                            ShoppingListItem)
+from users.models import SomeUser, Subscription
+
+USERS = 3
+REPEATS = 4
+
+
+class ConcurrentInteractionsTest(FoodgramTestMixin, TransactionTestCase):
+    """Параллельные повторы добавления: одно 201, остальные 400, без 500.
+
+    Дубликаты отсекают уникальные ограничения внутри точки сохранения,
+    счётчики и суммы списка покупок меняются только вместе со вставкой.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(
+            self.author, self.create_ingredients(3)
+        )
+        self.users = [
+            self.create_user(f'user{number}') for number in range(USERS)
+        ]
+
+    @staticmethod
+    def in_parallel(requests):
+        """Отправляет POST-запросы (пользователь, путь, данные) разом."""
+        clients = [
+            (FoodgramTestMixin.client_for(user), path, data)
+            for user, path, data in requests
+        ]
+        barrier = threading.Barrier(len(clients))
+
+        def post(request):
+            client, path, data = request
+            try:
+                barrier.wait()
+                return client.post(path, data, format='json').status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            return list(pool.map(post, clients))
+
+    def post_repeated(self, path):
+        """Каждый пользователь шлёт REPEATS одинаковых запросов."""
+        codes = self.in_parallel([
+            (user, path, None) for user in self.users for _ in range(REPEATS)
+        ])
+        for start in range(0, len(codes), REPEATS):
+            self.assertEqual(sorted(codes[start:start + REPEATS]), [
+                status.HTTP_201_CREATED,
+                *[status.HTTP_400_BAD_REQUEST] * (REPEATS - 1)
+            ])
+
+    def assert_shopping_lists(self):
+        amounts = dict(RecipeIngredient.objects.filter(
+            recipe=self.recipe
+        ).values_list('ingredient_id', 'amount'))
+        for user in self.users:
+            self.assertEqual(dict(ShoppingListItem.objects.filter(
+                user=user
+            ).values_list('ingredient_id', 'total')), amounts)
+        self.assertEqual(ShoppingListItem.objects.find_mismatches(), [])
+
+    def test_favorite(self):
+        self.post_repeated(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(Favorite.objects.count(), USERS)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, USERS)
+
+    def test_shopping_cart(self):
+        self.post_repeated(f'/api/recipes/{self.recipe.pk}/shopping_cart/')
+        self.assertEqual(ShoppingCart.objects.count(), USERS)
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipe.pk).shopping_cart_count, USERS
+        )
+        self.assert_shopping_lists()
+
+    def test_shopping_cart_single_and_bulk(self):
+        path = f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        self.in_parallel([
+            request
+            for user in self.users
+            for request in (
+                (user, path, None),
+                (user, '/api/recipes/shopping_cart/bulk/',
+                 {'ids': [self.recipe.pk]}),
+            )
+            for _ in range(REPEATS // 2)
+        ])
+        self.assertEqual(ShoppingCart.objects.count(), USERS)
+        self.assert_shopping_lists()
+
+    def test_subscribe(self):
+        self.post_repeated(f'/api/users/{self.author.pk}/subscribe/')
+        self.assertEqual(Subscription.objects.count(), USERS)
+        self.assertEqual(
+            SomeUser.objects.get(pk=self.author.pk).followers_count, USERS
+        )
+        for user in self.users:
+            self.assertEqual(
+                SomeUser.objects.get(pk=user.pk).following_count, 1
+            )
@@ -0,0 +1,125 @@
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Prefetch, Value
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.fast_serializers import (FastRecipeListSerializer,
+                                  FastSubscribeSerializer)
+from api.indexes import ingredient_index
+from api.renderers import ORJSONRenderer
+from api.serializers import (IngredientSerializer, RecipeListSerializer,
+                             SubscribeSerializer)
+from api.tests.base import FoodgramTestMixin
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from users.models import SomeUser, Subscription
+
+VARIANTS = {
+    'webp': {
+        '320': 'recipes/images/variants/test_320.webp',
+        '640': 'recipes/images/variants/test_640.webp',
+    },
+    'jpg': {'320': 'recipes/images/variants/test_320.jpg'},
+}
+
+
+class FastSerializersTest(FoodgramTestMixin, APITestCase):
+    """Быстрые сериализаторы отдают те же байты, что и DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingredients = cls.create_ingredients(4)
+        cls.user = cls.create_user('reader')
+        authors = [cls.create_user(f'author{number}') for number in range(3)]
+        recipes = [
+            cls.create_recipe(
+                authors[number % len(authors)], ingredients[number % 2:],
+                f'Рецепт {number}'
+            )
+            for number in range(6)
+        ]
+        # Половина картинок с уменьшенными копиями, половина без них.
+        Recipe.objects.filter(pk__in=[r.pk for r in recipes[::2]]).update(
+            image_variants=VARIANTS
+        )
+        SomeUser.objects.filter(pk=authors[0].pk).update(
+            avatar='users/avatars/test.png', avatar_variants=VARIANTS
+        )
+        SomeUser.objects.filter(pk=authors[1].pk).update(
+            avatar='users/avatars/test.png'
+        )
+        for author in authors[:2]:
+            Subscription.objects.create(user=cls.user, author=author)
+        Favorite.objects.create(user=cls.user, recipe=recipes[0])
+        Favorite.objects.create(user=cls.user, recipe=recipes[1])
+        ShoppingCart.objects.create(user=cls.user, recipe=recipes[1])
+        ShoppingCart.objects.create(user=cls.user, recipe=recipes[2])
+
+    def make_request(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        return request
+
+    def assert_same_bytes(self, drf_class, fast_class, objects, request):
+        context = {'request': request}
+        self.assertEqual(
+            ORJSONRenderer().render(
+                fast_class(objects, many=True, context=context).data
+            ),
+            JSONRenderer().render(
+                drf_class(objects, many=True, context=context).data
+            )
+        )
+
+    def test_recipe_list(self):
+        for user in (AnonymousUser(), self.user):
+            recipes = list(Recipe.objects.with_user_flags(user).order_by(
+                '-pub_date', '-id'
+            ))
+            with self.subTest(anonymous=user.is_anonymous):
+                self.assert_same_bytes(
+                    RecipeListSerializer, FastRecipeListSerializer, recipes,
+                    self.make_request(user)
+                )
+
+    def test_recipe_flags_and_srcset_covered(self):
+        recipes = list(Recipe.objects.with_user_flags(self.user))
+        self.assertEqual(
+            {
+                (bool(recipe.is_favorited), bool(recipe.is_in_shopping_cart))
+                for recipe in recipes
+            },
+            {(True, False), (True, True), (False, True), (False, False)}
+        )
+        self.assertEqual(
+            {bool(recipe.image_variants) for recipe in recipes}, {True, False}
+        )
+
+    def test_subscriptions(self):
+        authors = list(SomeUser.objects.filter(
+            subscribing__user=self.user
+        ).annotate(is_subscribed=Value(True)).prefetch_related(
+            Prefetch(
+                'recipes', queryset=Recipe.objects.all()[:3],
+                to_attr='limited_recipes'
+            )
+        ))
+        self.assertEqual(len(authors), 2)
+        self.assert_same_bytes(
+            SubscribeSerializer, FastSubscribeSerializer, authors,
+            self.make_request(self.user)
+        )
+
+    def test_ingredients(self):
+        items = ingredient_index.search('', 10)
+        self.assertEqual(
+            JSONRenderer().render(sorted(items, key=lambda x: x['id'])),
+            JSONRenderer().render(IngredientSerializer(
+                Ingredient.objects.filter(
+                    pk__in=[item['id'] for item in items]
+                ).order_by('id'), many=True
+            ).data)
+        )
+        self.assertEqual(
+            ORJSONRenderer().render(items), JSONRenderer().render(items)
+        )
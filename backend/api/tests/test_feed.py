@@ -0,0 +1,55 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import feeds
+from api.tests.base import FoodgramTestMixin
+from api.tests.test_images import InlineExecutor
+from recipes.models import FeedItem
+
+
+@mock.patch('recipes.models.FEED_FANOUT_MAX_FOLLOWERS', 1)
+@mock.patch.object(feeds, 'executor', InlineExecutor())
+# Соединение теста закрывать нельзя.
+@mock.patch.object(feeds, 'close_old_connections', lambda: None)
+class FeedRefillTest(FoodgramTestMixin, APITestCase):
+    """Отписка, вернувшая автора к раскладке, не заполняет ленты в запросе."""
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.readers = [self.create_user(f'reader{n}') for n in range(2)]
+        for reader in self.readers:
+            response = self.client_for(reader).post(
+                f'/api/users/{self.author.pk}/subscribe/'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Подписчиков больше порога: рецепт читается при выдаче ленты.
+        self.recipe = self.create_recipe(
+            self.author, self.create_ingredients(1)
+        )
+
+    def feed(self, reader):
+        return [
+            recipe['id'] for recipe in self.client_for(reader).get(
+                '/api/recipes/feed/'
+            ).data['results']
+        ]
+
+    def test_unsubscribe_defers_refill(self):
+        reader = self.readers[0]
+        self.assertEqual(self.feed(reader), [self.recipe.pk])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client_for(self.readers[1]).delete(
+                f'/api/users/{self.author.pk}/subscribe/'
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(FeedItem.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            list(FeedItem.objects.values_list('user', 'recipe')),
+            [(reader.pk, self.recipe.pk)]
+        )
+        self.assertEqual(self.feed(reader), [self.recipe.pk])
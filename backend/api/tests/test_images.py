@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import images
+from api.tests.base import FoodgramTestMixin
+from users.models import SomeUser
+
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywa'
+    'AAAACVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQI'
+    '12NgAAAAAgAB4iG8MwAAAABJRU5ErkJggg=='
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class InlineExecutor:
+    """Выполняет задачи пула сразу, в потоке теста."""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch.object(images, 'executor', InlineExecutor())
+# Соединение теста закрывать нельзя.
+@mock.patch.object(images, 'close_old_connections', lambda: None)
+class ImageVariantsCleanupTest(FoodgramTestMixin, APITestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('cook')
+        self.client = self.client_for(self.user)
+        self.ingredient, = self.create_ingredients(1)
+
+    @staticmethod
+    def variant_files(variants):
+        files = [
+            Path(MEDIA_ROOT, path)
+            for paths in variants.values() for path in paths.values()
+        ]
+        return [file for file in files if file.exists()]
+
+    def request(self, method, url, data=None, code=status.HTTP_200_OK):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, code)
+        return response
+
+    def avatar_variants(self):
+        return SomeUser.objects.get(pk=self.user.pk).avatar_variants
+
+    def test_avatar_replaced_and_removed(self):
+        self.request('put', '/api/users/me/avatar/', {'avatar': PNG})
+        first = self.avatar_variants()
+        self.assertEqual(len(self.variant_files(first)), 4)
+        self.request('put', '/api/users/me/avatar/', {'avatar': PNG})
+        second = self.avatar_variants()
+        self.assertEqual(self.variant_files(first), [])
+        self.assertEqual(len(self.variant_files(second)), 4)
+        self.request(
+            'delete', '/api/users/me/avatar/',
+            code=status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(self.avatar_variants(), {})
+        self.assertEqual(self.variant_files(second), [])
+
+    def test_owner_deleted(self):
+        self.request('put', '/api/users/me/avatar/', {'avatar': PNG})
+        response = self.request('post', '/api/recipes/', {
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 1}],
+            'image': PNG, 'name': 'Рецепт', 'text': 'Описание',
+            'cooking_time': 5,
+        }, code=status.HTTP_201_CREATED)
+        recipe = self.user.recipes.get(pk=response.data['id'])
+        files = [
+            *self.variant_files(recipe.image_variants),
+            *self.variant_files(self.avatar_variants()),
+        ]
+        self.assertEqual(len(files), 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual([file for file in files if file.exists()], [])
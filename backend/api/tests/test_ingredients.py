@@ -0,0 +1,20 @@
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+
+
+class IngredientLimitTest(FoodgramTestMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_ingredients(5)
+
+    def test_limit(self):
+        for limit, expected in (
+            ('2', 2), ('-1', 1), ('0', 1), ('abc', 5), ('', 5)
+        ):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    '/api/ingredients/', {'limit': limit}
+                )
+                self.assertEqual(len(response.data), expected)
@@ -0,0 +1,43 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+
+
+class RecipeMatchTest(FoodgramTestMixin, APITestCase):
+    """Подбор рецептов по id ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredients = cls.create_ingredients(3)
+        cls.recipe = cls.create_recipe(
+            cls.create_user('author'), cls.ingredients[:2]
+        )
+
+    def match(self, ingredients):
+        return self.client_for().get(
+            '/api/recipes/match/', {'ingredients': ingredients}
+        )
+
+    def test_match(self):
+        response = self.match(f'{self.ingredients[0].pk}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipe.pk]
+        )
+
+    def test_unknown_id_matches_nothing(self):
+        response = self.match(f'{2 ** 31 - 1}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+    def test_id_out_of_range(self):
+        known = self.ingredients[0].pk
+        for wrong in ('0', '-5', f'{2 ** 31}', '9' * 30):
+            with self.subTest(wrong=wrong):
+                response = self.match(f'{known},{wrong}')
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn('ingredients', response.data)
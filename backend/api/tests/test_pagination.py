@@ -0,0 +1,68 @@
+import json
+from base64 import urlsafe_b64encode
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+
+
+def make_cursor(values):
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class CursorPaginationTest(FoodgramTestMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ingredients = cls.create_ingredients(2)
+        cls.user = cls.create_user('reader')
+        for number in range(5):
+            cls.create_recipe(cls.user, ingredients, f'Рецепт {number}')
+
+    def test_pages_follow_default_ordering(self):
+        expected = [
+            recipe['id'] for recipe in self.client.get(
+                '/api/recipes/', {'limit': 5}
+            ).data['results']
+        ]
+        ids = []
+        url = '/api/recipes/?cursor=&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_forged_cursor(self):
+        client = self.client_for(self.user)
+        for cursor in (
+            'не base64', make_cursor({'a': 1}), make_cursor([1]),
+            make_cursor(['notadate', 1]), make_cursor([{'a': 1}, 1]),
+            make_cursor(['2026-01-01T00:00:00+00:00', 'abc']),
+            make_cursor([True, None]),
+        ):
+            for url in ('/api/recipes/', '/api/recipes/feed/'):
+                with self.subTest(url=url, cursor=cursor):
+                    response = client.get(url, {'cursor': cursor})
+                    self.assertEqual(
+                        response.status_code, status.HTTP_404_NOT_FOUND
+                    )
+
+    def test_cursor_with_other_ordering(self):
+        for params in (
+            {'ordering': 'popular'}, {'ordering': 'favorites_count'},
+            {'search': 'рецепт'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    '/api/recipes/', {'cursor': '', **params}
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+        response = self.client.get(
+            '/api/recipes/', {'cursor': '', 'ordering': '-pub_date'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
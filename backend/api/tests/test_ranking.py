@@ -0,0 +1,43 @@
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import Recipe, RecipeScore
+
+
+class RecipeRankingTest(FoodgramTestMixin, APITestCase):
+    """Сортировка по рейтингам popular и trending."""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingredients = cls.create_ingredients(2)
+        cls.author = cls.create_user('author')
+        cls.recipes = [
+            cls.create_recipe(cls.author, ingredients, f'Рецепт {number}')
+            for number in range(3)
+        ]
+        RecipeScore.objects.filter(recipe=cls.recipes[0]).update(
+            popular=5, trending=5
+        )
+
+    def test_score_created_with_recipe(self):
+        # Как из админки или shell: без view рецептов.
+        recipe = Recipe.objects.create(
+            author=self.author, name='Новый', text='Описание',
+            cooking_time=5, image='recipes/images/test.png'
+        )
+        self.assertTrue(RecipeScore.objects.filter(recipe=recipe).exists())
+
+    def test_ranked(self):
+        for ranking in ('popular', 'trending'):
+            with self.subTest(ranking=ranking):
+                response = self.client_for().get(
+                    '/api/recipes/', {'ordering': ranking}
+                )
+                self.assertEqual(response.data['count'], 3)
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.data['results']],
+                    [
+                        self.recipes[0].pk, self.recipes[2].pk,
+                        self.recipes[1].pk
+                    ]
+                )
@@ -0,0 +1,40 @@
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+class RecipeListQueriesTest(FoodgramTestMixin, APITestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        ingredients = cls.create_ingredients(5)
+        cls.user = cls.create_user('reader')
+        authors = [cls.create_user(f'author{number}') for number in range(5)]
+        recipes = [
+            cls.create_recipe(
+                authors[number % len(authors)], ingredients,
+                f'Рецепт {number}'
+            )
+            for number in range(30)
+        ]
+        Subscription.objects.create(user=cls.user, author=authors[0])
+        Favorite.objects.create(user=cls.user, recipe=recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=recipes[1])
+
+    def assert_constant_queries(self, client, queries):
+        for limit in (2, 6, 30):
+            with self.subTest(limit=limit), self.assertNumQueries(queries):
+                response = client.get('/api/recipes/', {'limit': limit})
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_anonymous(self):
+        self.assert_constant_queries(self.client_for(), 4)
+
+    def test_authenticated(self):
+        client = self.client_for(self.user)
+        # Первый запрос кладёт токен в кеш аутентификации.
+        client.get('/api/users/me/')
+        self.assert_constant_queries(client, 4)
@@ -0,0 +1,136 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+                            ShoppingListItem)
+
+
+class ShoppingListTotalsTest(FoodgramTestMixin, APITestCase):
+    """Суммы списка покупок сходятся с корзинами после любых удалений."""
+
+    def setUp(self):
+        super().setUp()
+        self.ingredients = self.create_ingredients(4)
+        self.author = self.create_user('author')
+        self.buyer = self.create_user('buyer')
+        self.recipe = self.create_recipe(self.author, self.ingredients[:3])
+        self.other = self.create_recipe(self.buyer, self.ingredients[1:])
+        for recipe in (self.recipe, self.other):
+            response = self.client_for(self.buyer).post(
+                f'/api/recipes/{recipe.pk}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def assert_totals_match_carts(self):
+        self.assertEqual(ShoppingListItem.objects.find_mismatches(), [])
+
+    def shopping_list(self):
+        return {
+            item['id']: item['amount']
+            for item in self.client_for(self.buyer).get(
+                '/api/recipes/shopping_list/'
+            ).data
+        }
+
+    def test_author_deletes_account(self):
+        response = self.client_for(self.author).delete(
+            '/api/users/me/', {'current_password': 'Pass-12345'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(
+            ShoppingCart.objects.filter(recipe_id=self.recipe.pk).exists()
+        )
+        self.assertEqual(self.shopping_list(), dict(
+            RecipeIngredient.objects.filter(
+                recipe=self.other
+            ).values_list('ingredient_id', 'amount')
+        ))
+        self.assert_totals_match_carts()
+
+    def test_recipe_deleted(self):
+        response = self.client_for(self.author).delete(
+            f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assert_totals_match_carts()
+        Recipe.objects.filter(pk=self.other.pk).delete()
+        self.assertEqual(self.shopping_list(), {})
+
+    def test_ingredient_rows_edited(self):
+        # Так сохраняет и удаляет строки RecipeIngredientInline в админке.
+        first, second, third = self.recipe.recipe_ingredients.order_by(
+            'ingredient_id'
+        )
+        first.amount += 10
+        first.save()
+        second.ingredient = self.ingredients[3]
+        second.save()
+        third.delete()
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredients[2], amount=7
+        )
+        self.assert_totals_match_carts()
+
+    def test_ingredient_deleted(self):
+        Ingredient.objects.filter(pk=self.ingredients[1].pk).delete()
+        self.assert_totals_match_carts()
+
+    def test_recipe_updated(self):
+        response = self.client_for(self.author).patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'ingredients': [
+                    {'id': self.ingredients[0].pk, 'amount': 5},
+                    {'id': self.ingredients[3].pk, 'amount': 2},
+                ],
+                'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 5,
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_totals_match_carts()
+
+    def test_removed_from_cart(self):
+        client = self.client_for(self.buyer)
+        response = client.delete(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assert_totals_match_carts()
+        response = client.delete(
+            '/api/recipes/shopping_cart/bulk/',
+            {'ids': [self.recipe.pk, self.other.pk]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.shopping_list(), {})
+
+    def test_rebuild_for_users(self):
+        before = self.shopping_list()
+        ShoppingListItem.objects.rebuild([self.buyer.pk, self.author.pk])
+        self.assertEqual(self.shopping_list(), before)
+        self.assert_totals_match_carts()
+
+
+class DownloadShoppingCartErrorsTest(FoodgramTestMixin, APITestCase):
+    """Ошибки выгрузки приходят в JSON при любом ?format."""
+
+    def test_anonymous_gets_json_error(self):
+        for file_format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=file_format):
+                response = self.client_for().get(
+                    '/api/recipes/download_shopping_cart/',
+                    {'format': file_format}
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('detail', response.json())
+
+    def test_file_still_downloaded(self):
+        response = self.client_for(self.create_user('buyer')).get(
+            '/api/recipes/download_shopping_cart/', {'format': 'csv'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
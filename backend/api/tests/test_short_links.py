@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from api.short_links import INVERSE, decode, encode
+from foodgram.constants import SHORT_LINK_MODULUS
+
+
+class ShortLinkCodeTest(SimpleTestCase):
+    """Коды коротких ссылок: длина и обратимость."""
+
+    def pk_for(self, number):
+        """id рецепта, который кодируется числом number."""
+        return number * INVERSE % SHORT_LINK_MODULUS
+
+    def test_max_length(self):
+        longest = self.pk_for(SHORT_LINK_MODULUS - 1)
+        self.assertEqual(len(encode(longest)), 8)
+        self.assertEqual(decode(encode(longest)), longest)
+
+    def test_seven_characters_boundary(self):
+        pk = self.pk_for(52 * 62 ** 6 - 1)
+        self.assertEqual(len(encode(pk)), 7)
+        self.assertEqual(len(encode(self.pk_for(52 * 62 ** 6))), 8)
+
+    def test_round_trip(self):
+        for pk in (1, 2, 61, 62, 10 ** 6, SHORT_LINK_MODULUS - 1):
+            with self.subTest(pk=pk):
+                self.assertLessEqual(len(encode(pk)), 8)
+                self.assertEqual(decode(encode(pk)), pk)
@@ -1,7 +1,9 @@
-from django.urls import include, path
+from django.conf import settings
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, UserViewSet
+from api.views import (IngredientViewSet, MetricsView, RecipeViewSet,
+                       UserViewSet)
 
 app_name = 'api'
 
@@ -11,6 +13,16 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
+    path('_metrics', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.SERVER_MODE == 'asgi':
+    from api import async_views
+
+    urlpatterns = [
+        path('recipes/', async_views.recipe_list),
+        re_path(r'^recipes/(?P<pk>[0-9]+)/$', async_views.recipe_detail),
+        path('ingredients/', async_views.ingredient_list),
+    ] + urlpatterns
@@ -1,35 +1,119 @@
-from django.db.models import Sum
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Sum, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserMixin
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from api.filters import IngredientsSearchFilter, RecipeFilter
-from api.pagination import LimitPagination
+from api.fast_serializers import (FastRecipeListSerializer,
+                                  FastSubscribeSerializer)
+from api.feeds import schedule_refill
+from api.filters import RecipeFilter
+from api.images import schedule_variants
+from api.indexes import (ingredient_index, parse_limit, recipe_ids,
+                         recipe_match_index)
+from api.metrics import SerializerTimingMixin, registry
+from api.pagination import FeedPagination, LimitPagination, MatchPagination
 from api.permissions import AuthorOrReadOnly
-from api.serializers import (AvatarSerializer, IngredientSerializer,
-                             RecipeCreatingSerializer, RecipeListSerializer,
-                             RecipeMiniSerializer, SubscribeSerializer)
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart)
+from api.renderers import (CSVRenderer, FileRenderer, PDFRenderer,
+                           PlainTextRenderer, PrometheusRenderer)
+from api.response_cache import response_cache
+from api.serializers import (AvatarSerializer, BulkIdsSerializer,
+                             IngredientSerializer, RecipeCreatingSerializer,
+                             RecipeListSerializer, RecipeMatchQuerySerializer,
+                             RecipeMatchSerializer, RecipeMiniSerializer,
+                             ShoppingListItemSerializer, SubscribeSerializer)
+from api.shopping_list import (EXPORTERS, bump_cart_version, get_cart_version,
+                               iter_cart_items)
+from api.short_links import clicks, decode, encode
+from foodgram.constants import RECOMMEND_SEED_LIMIT
+from recipes.counters import recount_recipes, recount_users
+from recipes.models import (Favorite, FeedItem, Ingredient, Recipe,
+                            ShoppingCart, ShoppingListItem)
 from users.models import SomeUser, Subscription
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+def manage_bulk(request, model, field, target_model, excluded=()):
+    """Пакетно добавляет (POST) или удаляет (DELETE) связи пользователя.
+
+    Все id проверяются одним запросом, новые связи вставляются одним
+    bulk_create. Возвращает id, для которых связь изменилась, и статус
+    по каждому id из запроса.
+    """
+    serializer = BulkIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    user = request.user
+    adding = request.method == 'POST'
+    found = set(target_model.objects.filter(
+        pk__in=ids
+    ).values_list('pk', flat=True)) - set(excluded)
+    links = model.objects.filter(user=user, **{f'{field}__in': found})
+    existing = set(links.values_list(field, flat=True))
+    if adding:
+        changed = found - existing
+        model.objects.bulk_create(
+            [model(user=user, **{field: pk}) for pk in changed],
+            ignore_conflicts=True
+        )
+    else:
+        changed = existing
+        links.delete()
+
+    results = []
+    for pk in ids:
+        if pk in excluded:
+            result = 'not_allowed'
+        elif pk not in found:
+            result = 'not_found'
+        elif adding:
+            result = 'added' if pk in changed else 'exists'
+        else:
+            result = 'removed' if pk in changed else 'absent'
+        results.append({'id': pk, 'status': result})
+    return changed, results
+
+
+class IngredientViewSet(SerializerTimingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientsSearchFilter
     pagination_class = None
-    search_fields = ('^name',)
+
+    def list(self, request):
+        """Автодополнение по индексу в памяти, без запросов к базе."""
+        return Response(ingredient_index.search(
+            request.query_params.get('name', ''),
+            parse_limit(request.query_params.get('limit'))
+        ))
 
 
-class UserViewSet(DjoserMixin):
+class UserViewSet(SerializerTimingMixin, DjoserMixin):
     pagination_class = LimitPagination
+    cursor_ordering = ('username', 'id')
+    # Действия, которые сохраняют request.user целиком.
+    user_saving_actions = (
+        'me', 'set_password', 'set_username', 'manage_avatar'
+    )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            self.action in self.user_saving_actions
+            and request.method not in permissions.SAFE_METHODS
+        ):
+            # Пользователь из кеша токенов может отставать от базы:
+            # save() записал бы его устаревшие поля поверх новых.
+            request.user = SomeUser.objects.get(pk=request.user.pk)
 
     def get_permissions(self):
         if self.action == 'me':
@@ -51,6 +135,7 @@ class UserViewSet(DjoserMixin):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         user.avatar.delete()
+        schedule_variants(user, 'avatar', [f'author:{user.pk}'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -59,9 +144,24 @@ class UserViewSet(DjoserMixin):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = SomeUser.objects.filter(subscribing__user=user)
+        recipes = Recipe.objects.all()
+        try:
+            recipes = recipes[:int(request.query_params['recipes_limit'])]
+        except (KeyError, ValueError):
+            pass
+        queryset = SomeUser.objects.filter(
+            subscribing__user=user
+        ).annotate(
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
         pages = self.paginate_queryset(queryset)
-        serializer = SubscribeSerializer(
+        serializer_class = (
+            FastSubscribeSerializer if settings.FAST_SERIALIZERS
+            else SubscribeSerializer
+        )
+        serializer = serializer_class(
             pages, many=True, context={'request': request}
         )
         return self.get_paginated_response(serializer.data)
@@ -81,23 +181,43 @@ class UserViewSet(DjoserMixin):
                     {'errors': 'Нельзя подписаться на самого себя.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            if Subscription.objects.filter(
-                user=subscriber, author=author
-            ).exists():
+            try:
+                with transaction.atomic():
+                    Subscription.objects.create(
+                        user=subscriber, author=author
+                    )
+                    SomeUser.objects.filter(pk=author.pk).update(
+                        followers_count=F('followers_count') + 1
+                    )
+                    SomeUser.objects.filter(pk=subscriber.pk).update(
+                        following_count=F('following_count') + 1
+                    )
+                    FeedItem.objects.add_authors(subscriber.pk, [author.pk])
+            except IntegrityError:
+                # Повторную подписку отсекает unique_subscription.
                 return Response(
                     {'errors': 'Вы уже подписаны на этого автора.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-
-            Subscription.objects.create(user=subscriber, author=author)
             serializer = SubscribeSerializer(
                 author, context={'request': request}
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        deleted_count, _ = Subscription.objects.filter(
-            user=subscriber, author=author
-        ).delete()
+        with transaction.atomic():
+            deleted_count, _ = Subscription.objects.filter(
+                user=subscriber, author=author
+            ).delete()
+            if deleted_count:
+                SomeUser.objects.filter(pk=author.pk).update(
+                    followers_count=F('followers_count') - 1
+                )
+                SomeUser.objects.filter(pk=subscriber.pk).update(
+                    following_count=F('following_count') - 1
+                )
+                schedule_refill(FeedItem.objects.remove_authors(
+                    subscriber.pk, [author.pk]
+                ))
 
         if deleted_count > 0:
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -106,45 +226,236 @@ class UserViewSet(DjoserMixin):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='subscribe/bulk',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def subscribe_bulk(self, request):
+        """Подписка или отписка сразу на несколько авторов."""
+        with transaction.atomic():
+            changed, results = manage_bulk(
+                request, Subscription, 'author_id', SomeUser,
+                excluded={request.user.pk}
+            )
+            if changed:
+                recount_users([request.user.pk, *changed])
+                if request.method == 'POST':
+                    FeedItem.objects.add_authors(request.user.pk, changed)
+                else:
+                    schedule_refill(FeedItem.objects.remove_authors(
+                        request.user.pk, changed
+                    ))
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     permission_classes = [AuthorOrReadOnly]
     pagination_class = LimitPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        return Recipe.objects.with_user_flags(self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            isinstance(response, Response)
+            and isinstance(response.accepted_renderer, FileRenderer)
+            and not status.is_success(response.status_code)
+        ):
+            # Ошибка выгрузки ?format=pdf|csv|txt: текст с типом файла
+            # клиент не разберёт.
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
+
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        lists = ('list', 'feed', 'similar', 'recommended')
+        if self.action in lists and settings.FAST_SERIALIZERS:
+            return FastRecipeListSerializer
+        if self.action in (*lists, 'retrieve'):
             return RecipeListSerializer
         return RecipeCreatingSerializer
 
+    def _cached_response(self, request, render, tags, get_data_tags):
+        """Ответ анонимному пользователю из кеша или с сохранением в кеш."""
+        key = response_cache.make_key(request)
+        data = response_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        versions = response_cache.get_versions(tags)
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(
+                key, response.data, get_data_tags(response.data), versions
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        render = super().list
+        if request.user.is_authenticated:
+            return render(request, *args, **kwargs)
+        return self._cached_response(
+            request,
+            lambda: render(request, *args, **kwargs),
+            ['recipes:list'],
+            lambda data: {
+                f'author:{recipe["author"]["id"]}'
+                for recipe in data['results']
+            }
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        render = super().retrieve
+        if request.user.is_authenticated:
+            return render(request, *args, **kwargs)
+        return self._cached_response(
+            request,
+            lambda: render(request, *args, **kwargs),
+            [f'recipe:{kwargs["pk"]}'],
+            lambda data: {f'author:{data["author"]["id"]}'}
+        )
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        SomeUser.objects.filter(pk=self.request.user.pk).update(
+            recipes_count=F('recipes_count') + 1
+        )
+        FeedItem.objects.fan_out(recipe)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        SomeUser.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') - 1
+        )
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые сверху; только курсор."""
+        paginator = FeedPagination()
+        page = paginator.paginate_feed(request.user, request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def match(self, request):
+        """Рецепты по имеющимся ингредиентам, сначала с большей долей."""
+        params = RecipeMatchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        paginator = MatchPagination()
+        page = paginator.paginate_match(
+            recipe_match_index.match(
+                params.validated_data['ingredients'],
+                params.validated_data.get('max_missing')
+            ),
+            request.user, request
+        )
+        serializer = RecipeMatchSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def _ranked_page(self, recipes):
+        page = self.paginate_queryset(recipes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие рецепты: соседи из RecipeSimilarity."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        return self._ranked_page(self.get_queryset().filter(
+            similar_to__recipe=recipe
+        ).order_by('-similar_to__score', '-pk'))
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def recommended(self, request):
+        """Соседи последних рецептов из избранного и корзины.
+
+        Без избранного и корзины — рецепты по рейтингу trending.
+        """
+        seeds = {
+            recipe_id
+            for model in (Favorite, ShoppingCart)
+            for recipe_id in model.objects.filter(
+                user=request.user
+            ).order_by('-created').values_list(
+                'recipe_id', flat=True
+            )[:RECOMMEND_SEED_LIMIT]
+        }
+        recipes = self.get_queryset()
+        if not seeds:
+            return self._ranked_page(recipes.ranked('trending'))
+        return self._ranked_page(recipes.filter(
+            similar_to__recipe__in=seeds,
+            is_favorited=False,
+            is_in_shopping_cart=False
+        ).annotate(
+            relevance=Sum('similar_to__score')
+        ).order_by('-relevance', '-pk'))
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
-        link = request.build_absolute_uri(f'/s/{pk}/')
+        recipe = get_object_or_404(Recipe, pk=pk)
+        link = request.build_absolute_uri(f'/s/{encode(recipe.pk)}/')
         return Response({'short-link': link}, status=status.HTTP_200_OK)
 
-    def _manage_interaction(self, request, pk, model):
+    def _manage_interaction(self, request, pk, model, counter):
         """Общий метод для избранного и корзины."""
         user = request.user
         recipe = get_object_or_404(Recipe, pk=pk)
 
         if request.method == 'POST':
-            if model.objects.filter(user=user, recipe=recipe).exists():
+            try:
+                with transaction.atomic():
+                    if model is ShoppingCart:
+                        ShoppingListItem.objects.lock_users([user.pk])
+                    model.objects.create(user=user, recipe=recipe)
+                    Recipe.objects.filter(pk=recipe.pk).update(
+                        **{counter: F(counter) + 1}
+                    )
+                    if model is ShoppingCart:
+                        ShoppingListItem.objects.add_recipes(
+                            user.pk, [recipe.pk]
+                        )
+            except IntegrityError:
+                # Повторное добавление отсекает уникальное ограничение.
                 return Response(
                     {'errors': 'Рецепт уже добавлен.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            model.objects.create(user=user, recipe=recipe)
             serializer = RecipeMiniSerializer(
                 recipe, context={'request': request}
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        deleted, _ = model.objects.filter(user=user, recipe=recipe).delete()
+        with transaction.atomic():
+            if model is ShoppingCart:
+                ShoppingListItem.objects.lock_users([user.pk])
+            # Суммы списка покупок вычитает приёмник post_delete.
+            deleted, _ = model.objects.filter(
+                user=user, recipe=recipe
+            ).delete()
+            if deleted:
+                Recipe.objects.filter(pk=recipe.pk).update(
+                    **{counter: F(counter) - 1}
+                )
         if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
@@ -158,7 +469,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated]
     )
     def favorite(self, request, pk=None):
-        return self._manage_interaction(request, pk, Favorite)
+        return self._manage_interaction(
+            request, pk, Favorite, 'favorites_count'
+        )
 
     @action(
         detail=True,
@@ -166,32 +479,114 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated]
     )
     def shopping_cart(self, request, pk=None):
-        return self._manage_interaction(request, pk, ShoppingCart)
+        return self._manage_interaction(
+            request, pk, ShoppingCart, 'shopping_cart_count'
+        )
+
+    def _manage_bulk_interaction(self, request, model):
+        """Пакетная версия _manage_interaction."""
+        with transaction.atomic():
+            if model is ShoppingCart:
+                # Добавленные рецепты определяются уже под блокировкой,
+                # поэтому параллельный запрос не учтёт их второй раз.
+                ShoppingListItem.objects.lock_users([request.user.pk])
+            changed, results = manage_bulk(request, model, 'recipe_id', Recipe)
+            if changed:
+                recount_recipes(changed)
+                if model is ShoppingCart and request.method == 'POST':
+                    ShoppingListItem.objects.add_recipes(
+                        request.user.pk, changed
+                    )
+                    transaction.on_commit(
+                        partial(bump_cart_version, request.user.pk)
+                    )
+        return Response({'results': results}, status=status.HTTP_200_OK)
 
     @action(
         detail=False,
-        methods=['get'],
+        methods=['post', 'delete'],
+        url_path='favorite/bulk',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def favorite_bulk(self, request):
+        return self._manage_bulk_interaction(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart/bulk',
         permission_classes=[permissions.IsAuthenticated]
     )
+    def shopping_cart_bulk(self, request):
+        return self._manage_bulk_interaction(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def shopping_list(self, request):
+        """Суммы ингредиентов из корзины в JSON."""
+        items = ShoppingListItem.objects.filter(
+            user=request.user
+        ).select_related('ingredient').order_by('ingredient__name')
+        return Response(ShoppingListItemSerializer(items, many=True).data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[permissions.IsAuthenticated],
+        renderer_classes=[
+            JSONRenderer, PlainTextRenderer, CSVRenderer, PDFRenderer
+        ]
+    )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(total=Sum('amount'))
-
-        lines = ['Ваш список покупок Foodgram:']
-        for item in ingredients:
-            name = item['ingredient__name']
-            unit = item['ingredient__measurement_unit']
-            amount = item['total']
-            lines.append(f"• {name} ({unit}) — {amount}")
-
-        content = '\n'.join(lines)
-        response = HttpResponse(content, content_type='text/plain')
-        response['Content-Disposition'] = (
-            'attachment; filename="foodgram_shopping_list.txt"'
-        )
+        """Список покупок в формате ?format=txt|csv|pdf.
+
+        Повторная выгрузка с совпадающим If-None-Match получает 304
+        без обращения к базе: ETag строится из версии корзины в кеше.
+        """
+        file_format = request.accepted_renderer.format
+        if file_format not in EXPORTERS:
+            file_format = 'txt'
+        exporter, content_type = EXPORTERS[file_format]
+        user_id = request.user.id
+        version = get_cart_version(user_id)
+        etag = f'"{user_id}-{version}-{file_format}"'
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in parse_etags(if_none_match) or if_none_match == '*':
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = StreamingHttpResponse(
+                exporter(iter_cart_items(user_id, version)),
+                content_type=content_type
+            )
+            response['Content-Disposition'] = (
+                'attachment; '
+                f'filename="foodgram_shopping_list.{file_format}"'
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
         return response
+
+
+def redirect_to_recipe(request, id=None, code=None):
+    """Переход по короткой ссылке /s/<код>/ или старой /s/<id>/.
+
+    Существование рецепта проверяется по битовой карте recipe_ids,
+    без запроса к базе.
+    """
+    pk = id if code is None else decode(code)
+    if pk is None or not recipe_ids.contains(pk):
+        raise Http404('Рецепт не найден.')
+    clicks.add(pk)
+    return redirect(f'/recipes/{pk}/')
+
+
+class MetricsView(APIView):
+    """Метрики RequestMetricsMiddleware в формате Prometheus."""
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(registry.render())
@@ -0,0 +1,310 @@
+"""Бенчмарк маршрутов API на сгенерированных данных.
+
+Запросы идут через тестовый клиент DRF по настоящим api.urls со всеми
+middleware. Для каждого сценария считаются p50/p95/p99 в миллисекундах,
+запросы в секунду и SQL-запросы на один запрос. Запуск из каталога
+backend (SQLite или Postgres из переменных окружения):
+    python -m benchmarks.api --users 200 --recipes 5000 --output run.json
+    python -m benchmarks.api --compare run.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from benchmarks.utils import percentiles, setup_django, temporary_database
+
+from foodgram.constants import PAGE_SIZE
+
+INGREDIENT_PREFIXES = ('мо', 'сах', 'кар', 'сол', 'яй', 'му', 'к')
+SEARCH_QUERIES = ('суп', 'сырный пирог', 'овощ', 'дом')
+
+
+def random_page(rng, data, limit=PAGE_SIZE):
+    """Одна из первых десяти страниц, которые есть при таком limit."""
+    pages = max(1, -(-data['recipe_count'] // limit))
+    return rng.randint(1, min(10, pages))
+
+
+def recipes_page(rng, data):
+    return f'/api/recipes/?page={random_page(rng, data)}'
+
+
+def recipes_page_limit(rng, data):
+    limit = rng.choice((6, 12, 24))
+    return (
+        f'/api/recipes/?page={random_page(rng, data, limit)}&limit={limit}'
+    )
+
+
+def recipes_cursor(rng, data):
+    return f'/api/recipes/?cursor=&limit={rng.choice((6, 12, 24))}'
+
+
+def recipes_ranked(rng, data):
+    return (
+        f'/api/recipes/?ordering={rng.choice(("popular", "trending"))}'
+        f'&page={random_page(rng, data)}'
+    )
+
+
+def recipes_favorited(rng, data):
+    return '/api/recipes/?is_favorited=true'
+
+
+def recipes_search(rng, data):
+    return '/api/recipes/?search=' + quote(rng.choice(SEARCH_QUERIES))
+
+
+def recipes_match(rng, data):
+    return '/api/recipes/match/?ingredients=' + ','.join(
+        str(pk) for pk in rng.sample(data['ingredient_ids'], 10)
+    )
+
+
+def recipe_detail(rng, data):
+    return f'/api/recipes/{rng.choice(data["recipe_ids"])}/'
+
+
+def subscriptions(rng, data):
+    return '/api/users/subscriptions/?recipes_limit=3'
+
+
+def recipes_feed(rng, data):
+    return f'/api/recipes/feed/?limit={rng.choice((6, 12, 24))}'
+
+
+def download_shopping_cart(rng, data):
+    return '/api/recipes/download_shopping_cart/'
+
+
+def ingredients_search(rng, data):
+    return '/api/ingredients/?name=' + quote(rng.choice(INGREDIENT_PREFIXES))
+
+
+# Название: (нужна ли аутентификация, построитель пути).
+SCENARIOS = {
+    'recipes:list:anonymous': (False, recipes_page),
+    'recipes:list:limit': (True, recipes_page_limit),
+    'recipes:list:cursor': (True, recipes_cursor),
+    'recipes:list:ranked': (True, recipes_ranked),
+    'recipes:list:favorited': (True, recipes_favorited),
+    'recipes:search': (True, recipes_search),
+    'recipes:match': (True, recipes_match),
+    'recipes:detail': (True, recipe_detail),
+    'users:subscriptions': (True, subscriptions),
+    'recipes:feed': (True, recipes_feed),
+    'recipes:download_shopping_cart': (True, download_shopping_cart),
+    'ingredients:search': (False, ingredients_search),
+}
+
+
+class QueryCounter:
+    """execute_wrapper, считающий SQL-запросы без DEBUG-лога."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def request(client, path, token):
+    if token:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+    else:
+        client.credentials()
+    response = client.get(path, HTTP_ACCEPT='application/json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def run_scenario(name, data, requests, warmup, seed):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    needs_auth, build_path = SCENARIOS[name]
+    rng = random.Random(f'{seed}:{name}')
+    client = APIClient()
+
+    def token():
+        return rng.choice(data['tokens']) if needs_auth else None
+
+    for _ in range(warmup):
+        request(client, build_path(rng, data), token())
+    timings = []
+    queries = []
+    statuses = Counter()
+    started = time.perf_counter()
+    for _ in range(requests):
+        path = build_path(rng, data)
+        user_token = token()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            request_started = time.perf_counter()
+            statuses[request(client, path, user_token)] += 1
+            timings.append((time.perf_counter() - request_started) * 1000)
+        queries.append(counter.count)
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'rps': round(requests / elapsed, 1),
+        **percentiles(timings),
+        'mean': round(statistics.mean(timings), 3),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'statuses': {str(code): count for code, count in statuses.items()},
+    }
+
+
+def load_data():
+    from rest_framework.authtoken.models import Token
+
+    from recipes.models import Ingredient, Recipe
+
+    return {
+        'tokens': list(Token.objects.filter(
+            user__shopping_cart__isnull=False
+        ).distinct().values_list('key', flat=True)[:1000]),
+        'recipe_ids': list(Recipe.objects.values_list('id', flat=True)[
+            :10000
+        ]),
+        'recipe_count': Recipe.objects.count(),
+        'ingredient_ids': list(Ingredient.objects.values_list(
+            'id', flat=True
+        )),
+    }
+
+
+def check_favorited_filter(data):
+    """Фильтр избранного должен сужать выдачу, иначе замер бессмыслен."""
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from recipes.models import Favorite
+
+    token = Token.objects.filter(
+        key__in=data['tokens'], user__favorites__isnull=False
+    ).values_list('key', 'user_id').first()
+    if token is None:
+        raise SystemExit('В базе нет пользователей с избранным.')
+    key, user_id = token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+    count = client.get(recipes_favorited(None, data)).data['count']
+    expected = Favorite.objects.filter(user_id=user_id).count()
+    if count != expected:
+        raise SystemExit(
+            f'Фильтр избранного вернул {count} рецептов из '
+            f'{data["recipe_count"]}, в избранном {expected}.'
+        )
+
+
+def run(args):
+    from benchmarks.data import generate
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    if not args.existing:
+        generate(
+            users=args.users, recipes=args.recipes, seed=args.seed,
+            subscriptions=args.subscriptions, favorites=args.favorites,
+            cart=args.cart
+        )
+    data = load_data()
+    if not data['tokens'] or not data['recipe_ids']:
+        raise SystemExit('В базе нет пользователей с корзиной или рецептов.')
+    names = args.scenarios or list(SCENARIOS)
+    overrides = {'ALLOWED_HOSTS': ['testserver']}
+    if not args.debug:
+        overrides['DEBUG'] = False
+    with override_settings(**overrides):
+        if 'recipes:list:favorited' in names:
+            check_favorited_filter(data)
+        results = {
+            name: run_scenario(
+                name, data, args.requests, args.warmup, args.seed
+            )
+            for name in names
+        }
+    return {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'users': args.users,
+            'recipes': args.recipes,
+            'requests': args.requests,
+            'seed': args.seed,
+            'existing': args.existing,
+        },
+        'scenarios': results,
+    }
+
+
+def compare(current, baseline):
+    """Печатает изменение p50, p95 и req/s относительно прошлого прогона."""
+    print(f'{"сценарий":34} {"p50":>16} {"p95":>16} {"req/s":>16}')
+    for name, result in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        cells = []
+        for key in ('p50', 'p95', 'rps'):
+            change = (result[key] - old[key]) / old[key] * 100
+            cells.append(f'{result[key]:>8} {change:+6.1f}%')
+        print(f'{name:34} {" ".join(cells)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--subscriptions', type=int, default=10)
+    parser.add_argument('--favorites', type=int, default=20)
+    parser.add_argument('--cart', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=list(SCENARIOS), metavar='NAME'
+    )
+    parser.add_argument(
+        '--existing', action='store_true',
+        help='Работать с базой из настроек как есть, без генерации.'
+    )
+    parser.add_argument(
+        '--debug', action='store_true',
+        help='Не выключать DEBUG на время замеров.'
+    )
+    parser.add_argument('--output', help='Файл для результатов в JSON.')
+    parser.add_argument('--compare', help='JSON прошлого прогона.')
+    args = parser.parse_args()
+    setup_django()
+    if args.existing:
+        result = run(args)
+    else:
+        with temporary_database():
+            result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(result, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
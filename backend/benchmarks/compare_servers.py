@@ -0,0 +1,129 @@
+"""Нагрузочное сравнение режимов SERVER_MODE=wsgi и SERVER_MODE=asgi.
+
+Поднимает gunicorn в каждом режиме на той же базе, что и manage.py,
+гоняет одинаковую смесь GET-запросов и печатает запросы в секунду
+и перцентили задержки. Запуск из каталога backend на наполненной базе:
+    python -m benchmarks.compare_servers --workers 4 --concurrency 32
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from benchmarks.utils import percentiles
+
+COMMANDS = {
+    'wsgi': ['foodgram.wsgi:application'],
+    'asgi': [
+        'foodgram.asgi:application',
+        '--worker-class', 'uvicorn_worker.UvicornWorker',
+    ],
+}
+PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2',
+    '/api/recipes/?limit=12',
+    '/api/ingredients/?name=' + quote('мол'),
+    '/s/1/',
+)
+
+
+def start_server(mode, port, workers):
+    env = {**os.environ, 'SERVER_MODE': mode}
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', *COMMANDS[mode],
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--log-level', 'warning',
+        ],
+        env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            connection.request('GET', PATHS[0])
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'Сервер {mode} не запустился за 30 секунд.')
+
+
+def run_load(port, concurrency, duration, headers):
+    timings = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(number):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        step = number
+        while time.monotonic() < stop_at:
+            path = PATHS[step % len(PATHS)]
+            step += 1
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port)
+                with lock:
+                    errors.append(path)
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                if response.status >= 500:
+                    errors.append(path)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return {
+        'requests': len(timings),
+        'errors': len(errors),
+        'rps': round(len(timings) / duration, 1),
+        **percentiles(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument(
+        '--token', help='Токен пользователя: нагрузка без кеша анонимов.'
+    )
+    args = parser.parse_args()
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+    results = {}
+    for mode in args.modes:
+        process = start_server(mode, args.port, args.workers)
+        try:
+            run_load(args.port, args.concurrency, args.warmup, headers)
+            results[mode] = run_load(
+                args.port, args.concurrency, args.duration, headers
+            )
+        finally:
+            process.terminate()
+            process.wait()
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Генератор тестовых данных для бенчмарков.
+
+Ингредиенты берутся из data/ingredients.csv, у рецептов от 3 до 15
+ингредиентов. Все случайные выборы зависят только от seed, поэтому
+прогоны на одинаковых параметрах сравнимы.
+"""
+import csv
+import random
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.indexes import ingredient_index, recipe_match_index
+from recipes.counters import recount_recipes, recount_users
+from recipes.models import (Favorite, FeedItem, Ingredient, Recipe,
+                            RecipeIngredient, RecipeScore, ShoppingCart,
+                            ShoppingListItem)
+from recipes.search import update_search_index
+from users.models import SomeUser, Subscription
+
+INGREDIENTS_CSV = Path(settings.BASE_DIR).parent / 'data' / 'ingredients.csv'
+INGREDIENTS_PER_RECIPE = (3, 15)
+WORDS = (
+    'суп', 'салат', 'пирог', 'рагу', 'каша', 'запеканка', 'омлет', 'соус',
+    'быстрый', 'домашний', 'летний', 'острый', 'сырный', 'овощной',
+)
+BATCH_SIZE = 1000
+
+
+def load_ingredients(path=INGREDIENTS_CSV):
+    if not Ingredient.objects.exists():
+        with open(path, encoding='utf-8') as file:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in csv.reader(file)
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True
+            )
+        ingredient_index.invalidate()
+    return list(Ingredient.objects.values_list('id', flat=True))
+
+
+def generate(users=50, recipes=500, subscriptions=10, favorites=20,
+             cart=5, seed=0):
+    """Создаёт данные и возвращает id пользователей и рецептов.
+
+    subscriptions, favorites и cart — число связей на одного
+    пользователя.
+    """
+    rng = random.Random(seed)
+    ingredient_ids = load_ingredients()
+    password = make_password('benchmark')
+    start = SomeUser.objects.count()
+    user_objects = SomeUser.objects.bulk_create(
+        (
+            SomeUser(
+                username=f'bench{number}',
+                email=f'bench{number}@example.com',
+                first_name='Бенч', last_name=f'Пользователь {number}',
+                password=password
+            )
+            for number in range(start, start + users)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    user_ids = [user.pk for user in user_objects]
+    if None in user_ids:
+        # bulk_create не возвращает pk в SQLite старше 3.35.
+        user_ids = list(SomeUser.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:users])
+    Token.objects.bulk_create(
+        Token(key=Token.generate_key(), user_id=user_id)
+        for user_id in user_ids
+    )
+
+    recipe_objects = Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                text=' '.join(rng.choices(WORDS, k=30)),
+                cooking_time=rng.randint(5, 180),
+                image='recipes/images/benchmark.png'
+            )
+            for _ in range(recipes)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    recipe_ids = [recipe.pk for recipe in recipe_objects]
+    if None in recipe_ids:
+        recipe_ids = list(Recipe.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:recipes])
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id, ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500)
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, rng.randint(*INGREDIENTS_PER_RECIPE)
+            )
+        ),
+        batch_size=BATCH_SIZE
+    )
+    recipe_match_index.invalidate()
+
+    def links(model, field, targets, per_user, exclude_self=False):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, **{field: target})
+                for user_id in user_ids
+                for target in rng.sample(
+                    targets, min(per_user, len(targets))
+                )
+                if not (exclude_self and target == user_id)
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+    links(Subscription, 'author_id', user_ids, subscriptions, True)
+    links(Favorite, 'recipe_id', recipe_ids, favorites)
+    links(ShoppingCart, 'recipe_id', recipe_ids, cart)
+    for batch in range(0, len(recipe_ids), BATCH_SIZE):
+        recount_recipes(recipe_ids[batch:batch + BATCH_SIZE])
+        update_search_index(recipe_ids[batch:batch + BATCH_SIZE])
+    for batch in range(0, len(user_ids), BATCH_SIZE):
+        recount_users(user_ids[batch:batch + BATCH_SIZE])
+        ShoppingListItem.objects.rebuild(user_ids[batch:batch + BATCH_SIZE])
+        FeedItem.objects.rebuild(user_ids[batch:batch + BATCH_SIZE])
+    RecipeScore.objects.refresh(rebuild=True, until=timezone.now())
+    return user_ids, recipe_ids
@@ -0,0 +1,101 @@
+"""Подбор рецептов по ингредиентам: SQL с GROUP BY против RecipeMatchIndex.
+
+Для каждого набора ингредиентов первая страница из индекса сверяется
+с SQL; при расхождении скрипт завершается с ошибкой. Запуск из
+каталога backend:
+    python -m benchmarks.match --recipes 100000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks.utils import percentiles, setup_django, temporary_database
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(recipes, queries, owned, page_size, seed):
+    from benchmarks.data import generate
+    from django.db.models import Count, F, FloatField, Q
+    from django.db.models.functions import Cast
+
+    from api.indexes import RecipeMatchIndex
+    from recipes.models import RecipeIngredient
+
+    generate(
+        users=max(20, recipes // 500), recipes=recipes, subscriptions=5,
+        favorites=0, cart=0, seed=seed
+    )
+    rng = random.Random(seed)
+    ingredient_ids = list(RecipeIngredient.objects.values_list(
+        'ingredient_id', flat=True
+    ).distinct())
+    index = RecipeMatchIndex()
+    data, build_ms = timed(index.build)
+
+    def sql_page(ids):
+        rows = RecipeIngredient.objects.values('recipe_id').annotate(
+            total=Count('id'),
+            owned=Count('id', filter=Q(ingredient_id__in=ids)),
+        ).filter(owned__gt=0).annotate(
+            coverage=Cast('owned', FloatField()) / F('total'),
+            missing=F('total') - F('owned'),
+        ).order_by('-coverage', 'missing', '-recipe_id')
+        return rows.count(), [row['recipe_id'] for row in rows[:page_size]]
+
+    def index_page(ids):
+        found = index.find(data, ids)
+        return len(found), [int(pk) for pk in found.id[:page_size]]
+
+    timings = {'sql': [], 'index': []}
+    for _ in range(queries):
+        ids = rng.sample(ingredient_ids, owned)
+        expected, sql_ms = timed(lambda: sql_page(ids))
+        got, index_ms = timed(lambda: index_page(ids))
+        if got != expected:
+            sys.exit(f'Индекс и SQL различаются для ингредиентов {ids}.')
+        timings['sql'].append(sql_ms)
+        timings['index'].append(index_ms)
+
+    changes = {
+        recipe_id: rng.sample(ingredient_ids, rng.randint(3, 15))
+        for recipe_id in rng.sample(range(1, recipes + 1), 100)
+    }
+    _, apply_ms = timed(lambda: index.apply_changes(data, changes))
+    keys, _ = data
+    return {
+        'recipes': recipes,
+        'pairs': len(keys),
+        'index_mb': round((keys.nbytes + data[1].nbytes) / 2 ** 20, 1),
+        'build_ms': round(build_ms, 1),
+        'apply_100_changes_ms': round(apply_ms, 1),
+        'owned_ingredients': owned,
+        'sql_ms': percentiles(timings['sql']),
+        'index_ms': percentiles(timings['index']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--owned', type=int, default=10)
+    parser.add_argument('--page', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    setup_django()
+    with temporary_database():
+        print(json.dumps(
+            run(args.recipes, args.queries, args.owned, args.page, args.seed),
+            ensure_ascii=False, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
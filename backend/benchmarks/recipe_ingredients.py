@@ -0,0 +1,104 @@
+"""Обновление рецепта с 50 ингредиентами: полная перезапись и разница.
+
+Запуск из каталога backend:
+    python -m benchmarks.recipe_ingredients
+"""
+import argparse
+import json
+
+from benchmarks.utils import measure, setup_django, temporary_database
+
+
+def run(ingredients_count, repeat):
+    from rest_framework.test import APIRequestFactory
+
+    from api.serializers import RecipeCreatingSerializer
+    from recipes.models import Ingredient, Recipe, RecipeIngredient
+    from users.models import SomeUser
+
+    author = SomeUser.objects.create_user(
+        username='bench', email='bench@example.com', password='bench',
+        first_name='bench', last_name='bench'
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(ingredients_count * 2)
+    )
+    recipe = Recipe.objects.create(
+        author=author, name='Рецепт', text='Текст', cooking_time=10,
+        image='recipes/images/bench.png'
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+        for ingredient in ingredients[:ingredients_count]
+    )
+    request = APIRequestFactory().put('/')
+    request.user = author
+    counter = {'step': 0}
+
+    def payload(shift=0):
+        counter['step'] += 1
+        items = [
+            {'id': ingredient.id, 'amount': 1}
+            for ingredient in ingredients[shift:shift + ingredients_count]
+        ]
+        items[0]['amount'] = counter['step'] % 5 + 1
+        return {
+            'name': 'Рецепт', 'text': 'Текст', 'cooking_time': 10,
+            'ingredients': items,
+        }
+
+    def validate():
+        serializer = RecipeCreatingSerializer(
+            recipe, data=payload(), context={'request': request},
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+
+    def update(data):
+        instance = Recipe.objects.prefetch_related(
+            'recipe_ingredients'
+        ).get(pk=recipe.pk)
+        serializer = RecipeCreatingSerializer(
+            instance, data=data, context={'request': request}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def rewrite_all():
+        data = payload()
+        Recipe.objects.filter(pk=recipe.pk).update(name=data['name'])
+        recipe.recipe_ingredients.all().delete()
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=item['id'],
+                amount=item['amount']
+            )
+            for item in data['ingredients']
+        )
+
+    return {
+        'ingredients': ingredients_count,
+        'validate': measure(validate, repeat),
+        'update_one_amount': measure(lambda: update(payload()), repeat),
+        'update_replace_five': measure(
+            lambda: update(payload(shift=5 * (counter['step'] % 2))), repeat
+        ),
+        'baseline_delete_and_insert': measure(rewrite_all, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ingredients', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    setup_django()
+    with temporary_database():
+        print(json.dumps(
+            run(args.ingredients, args.repeat), ensure_ascii=False, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
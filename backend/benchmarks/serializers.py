@@ -0,0 +1,137 @@
+"""Сериализация и рендер страницы списков: DRF против FAST_SERIALIZERS.
+
+Совпадение ответов байт в байт проверяют тесты
+api.tests.test_fast_serializers. Время считается на уже загруженной
+странице, без SQL. Запуск из каталога backend:
+    python -m benchmarks.serializers --page 100
+"""
+import argparse
+import json
+import time
+
+from benchmarks.utils import setup_django, temporary_database
+
+
+def best_of(func, repeat):
+    """Лучшее время вызова в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 3)
+
+
+def run(page_size, repeat):
+    from benchmarks.data import generate
+    from django.contrib.auth.models import AnonymousUser
+    from django.db.models import Prefetch, Value
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.fast_serializers import (FastRecipeListSerializer,
+                                      FastSubscribeSerializer)
+    from api.indexes import ingredient_index
+    from api.renderers import ORJSONRenderer
+    from api.serializers import RecipeListSerializer, SubscribeSerializer
+    from recipes.models import Recipe
+    from users.models import SomeUser
+
+    user_ids, recipe_ids = generate(
+        users=max(20, page_size // 5), recipes=page_size * 2,
+        subscriptions=page_size // 5
+    )
+    # Часть картинок с уменьшенными копиями, как в живой выдаче.
+    variants = {'webp': {'320': 'recipes/images/variants/b_320.webp'}}
+    Recipe.objects.filter(pk__in=recipe_ids[::3]).update(
+        image_variants=variants
+    )
+    SomeUser.objects.filter(pk__in=user_ids[::4]).update(
+        avatar='users/avatars/bench.png', avatar_variants=variants
+    )
+    user = SomeUser.objects.get(pk=user_ids[0])
+    factory = APIRequestFactory()
+
+    def make_request(request_user):
+        request = Request(factory.get('/api/recipes/'))
+        request.user = request_user
+        return request
+
+    cases = {}
+    for label, request_user in (('anonymous', AnonymousUser()),
+                                ('authenticated', user)):
+        request = make_request(request_user)
+        recipes = list(Recipe.objects.with_user_flags(request_user).order_by(
+            '-pub_date', '-id'
+        )[:page_size])
+        cases[f'recipes:{label}'] = (
+            RecipeListSerializer, FastRecipeListSerializer, recipes, request
+        )
+    authors = list(SomeUser.objects.filter(
+        subscribing__user=user
+    ).annotate(is_subscribed=Value(True)).prefetch_related(
+        Prefetch(
+            'recipes', queryset=Recipe.objects.all()[:3],
+            to_attr='limited_recipes'
+        )
+    ))
+    cases['subscriptions'] = (
+        SubscribeSerializer, FastSubscribeSerializer, authors,
+        make_request(user)
+    )
+
+    results = {}
+    for name, (drf_class, fast_class, objects, request) in cases.items():
+        context = {'request': request}
+
+        def drf():
+            return JSONRenderer().render(
+                drf_class(objects, many=True, context=context).data
+            )
+
+        def fast():
+            return ORJSONRenderer().render(
+                fast_class(objects, many=True, context=context).data
+            )
+
+        drf_ms = best_of(drf, repeat)
+        fast_ms = best_of(fast, repeat)
+        results[name] = {
+            'objects': len(objects),
+            'drf_ms': drf_ms,
+            'fast_ms': fast_ms,
+            'speedup': round(drf_ms / fast_ms, 1),
+        }
+
+    # Ингредиенты уже отдаются словарями из индекса: меняется только рендер.
+    items = ingredient_index.search('', page_size)
+    drf_ms = best_of(lambda: JSONRenderer().render(items), repeat)
+    fast_ms = best_of(lambda: ORJSONRenderer().render(items), repeat)
+    results['ingredients'] = {
+        'objects': len(items),
+        'drf_ms': drf_ms,
+        'fast_ms': fast_ms,
+        'speedup': round(drf_ms / fast_ms, 1),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    setup_django()
+    from django.test.utils import override_settings
+
+    with temporary_database(), override_settings(
+        ALLOWED_HOSTS=['testserver']
+    ):
+        print(json.dumps(
+            run(args.page, args.repeat), ensure_ascii=False, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Расчёт похожих рецептов и чтение /similar/ и /recommended/.
+
+Запуск из каталога backend:
+    python -m benchmarks.similarity --recipes 20000
+"""
+import argparse
+import json
+import random
+import resource
+import time
+
+from benchmarks.utils import measure, setup_django, temporary_database
+
+
+def run(recipes, users, chunk_size, repeat, seed):
+    from benchmarks.data import generate
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from recipes.models import RecipeSimilarity
+    from recipes.similarity import build_similarity
+
+    user_ids, recipe_ids = generate(
+        users=users, recipes=recipes, subscriptions=5, favorites=30,
+        cart=10, seed=seed
+    )
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    _, rows = build_similarity(chunk_size=chunk_size)
+    build_s = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rng = random.Random(seed)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.filter(
+        user_id__in=user_ids
+    ).values_list('key', flat=True).first())
+    return {
+        'recipes': recipes,
+        'users': users,
+        'chunk_size': chunk_size,
+        'neighbours': rows,
+        'recipes_with_neighbours': RecipeSimilarity.objects.values(
+            'recipe'
+        ).distinct().count(),
+        'build_s': round(build_s, 1),
+        'build_peak_rss_growth_mb': round((rss_after - rss_before) / 1024, 1),
+        'similar': measure(
+            lambda: client.get(
+                f'/api/recipes/{rng.choice(recipe_ids)}/similar/'
+            ),
+            repeat
+        ),
+        'recommended': measure(
+            lambda: client.get('/api/recipes/recommended/'), repeat
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    setup_django()
+    from django.test.utils import override_settings
+
+    with temporary_database(), override_settings(
+        ALLOWED_HOSTS=['testserver']
+    ):
+        print(json.dumps(
+            run(
+                args.recipes, args.users, args.chunk_size, args.repeat,
+                args.seed
+            ),
+            ensure_ascii=False, indent=2
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Общие помощники бенчмарков: настройка Django и временная база."""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def temporary_database():
+    """Создаёт тестовую базу рядом с основной и удаляет её после прогона."""
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    old_name = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as media_root:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat):
+    """Время выполнения func в миллисекундах и число запросов к базе."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context))
+    return {
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': round(statistics.mean(queries), 1),
+    }
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """Перцентили по ближайшему рангу, в тех же единицах, что values."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{point}': None for point in points}
+    return {
+        f'p{point}': round(
+            ordered[min(len(ordered) - 1, len(ordered) * point // 100)], 3
+        )
+        for point in points
+    }
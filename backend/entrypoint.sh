@@ -6,4 +6,9 @@ python manage.py collectstatic --no-input
 
 cp -r /app/static/. /backend_static/static/
 
-gunicorn foodgram.wsgi:application --bind 0.0.0.0:8000
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn foodgram.asgi:application --bind 0.0.0.0:8000 \
+        --worker-class uvicorn_worker.UvicornWorker
+else
+    gunicorn foodgram.wsgi:application --bind 0.0.0.0:8000
+fi
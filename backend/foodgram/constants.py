@@ -4,3 +4,83 @@ MAX_LENGTH_TITLE = 200
 MAX_LENGTH_UNIT = 200
 
 PAGE_SIZE = 6
+
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60 * 24
+SHOPPING_LIST_CHUNK_SIZE = 2000
+
+SEARCH_CONFIG = 'russian'
+# Веса D, C, B, A для SearchRank: название > ингредиенты > описание.
+SEARCH_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+BULK_MAX_IDS = 100
+
+# Рецепты авторов с большим числом подписчиков не раскладываются
+# по лентам при публикации, а подмешиваются при чтении.
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+# Сколько последних рецептов автора попадает в ленту при подписке.
+FEED_BACKFILL_LIMIT = 100
+FEED_WORKERS = 1
+
+# Рейтинги рецептов: вес события и период полураспада в секундах.
+RECIPE_SCORE_FAVORITE_WEIGHT = 1
+RECIPE_SCORE_CART_WEIGHT = 2
+RECIPE_SCORE_HALF_LIVES = {
+    'popular': 60 * 60 * 24 * 30,
+    'trending': 60 * 60 * 24,
+}
+# События моложе этого ждут следующего пересчёта.
+RECIPE_SCORE_LAG = 60
+# Через столько секунд точка отсчёта переносится: 2 ** 180 для trending.
+RECIPE_SCORE_REBASE_AFTER = 60 * 60 * 24 * 180
+RECIPE_SCORE_BATCH_SIZE = 500
+
+# Подбор рецептов по ингредиентам.
+MATCH_MAX_INGREDIENTS = 50
+# Индекс хранит пару (ингредиент, рецепт) в int64: id не больше 2 ** 31 - 1.
+MATCH_MAX_INGREDIENT_ID = 2 ** 31 - 1
+# На сколько изменений процесс догоняет индекс, прежде чем собрать заново.
+MATCH_INDEX_MAX_LAG = 1000
+MATCH_INDEX_CHANGE_TTL = 60 * 60 * 24
+MATCH_INDEX_CHUNK_SIZE = 10000
+
+# Похожие рецепты: веса сходства по избранному, корзинам и ингредиентам.
+SIMILARITY_FAVORITE_WEIGHT = 1.0
+SIMILARITY_CART_WEIGHT = 0.5
+SIMILARITY_INGREDIENT_WEIGHT = 0.3
+SIMILARITY_TOP_K = 20
+SIMILARITY_CHUNK_SIZE = 1000
+# Сколько последних рецептов из избранного и корзины берётся
+# для рекомендаций.
+RECOMMEND_SEED_LIMIT = 50
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# Коды коротких ссылок: id * MULTIPLIER по модулю 62 ** 7. Первый
+# символ — буква (основание 52), поэтому числа от 52 * 62 ** 6 дают
+# код из 8 символов, остальные — не длиннее 7. Модуль не меняется,
+# чтобы выданные ссылки не сломались. MULTIPLIER взаимно прост с 62.
+SHORT_LINK_MODULUS = 62 ** 7
+SHORT_LINK_MULTIPLIER = 2_654_435_761
+SHORT_LINK_CLICKS_FLUSH_SIZE = 100
+SHORT_LINK_CLICKS_FLUSH_INTERVAL = 10
+
+# Кеш аутентификации по токену: локальный LRU и общий кеш.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 30
+AUTH_TOKEN_SHARED_CACHE_TTL = 60 * 5
+
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+ALLOWED_IMAGE_TYPES = ('png', 'jpeg', 'jpg', 'gif', 'webp')
+IMAGE_VARIANT_WIDTHS = (320, 640)
+IMAGE_VARIANT_FORMATS = (('WEBP', 'webp'), ('JPEG', 'jpg'))
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_WORKERS = 2
+
+# Повтор одного SQL столько раз за запрос считается признаком N+1.
+DUPLICATE_QUERY_THRESHOLD = 2
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+METRICS_WINDOW = 1000
@@ -35,6 +35,25 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing, лог api.metrics и /api/_metrics; см. api/metrics.py.
+if os.getenv('REQUEST_METRICS', 'False') == 'True':
+    MIDDLEWARE.insert(0, 'api.metrics.RequestMetricsMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -72,8 +91,38 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # SELECT ... FOR UPDATE в SQLite нет: транзакция сразу берёт
+            # блокировку записи, параллельные ждут её, а не получают
+            # «database is locked».
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+            # Потокам тестов нужна общая база в файле, а не в памяти.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
         }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+RESPONSE_CACHE_ALIAS = os.getenv('RESPONSE_CACHE_ALIAS', 'default')
+
+# Общий уровень кеша токенов (например, default с Redis); без него
+# каждый процесс держит только свой LRU, см. api/authentication.py.
+AUTH_TOKEN_CACHE_ALIAS = os.getenv('AUTH_TOKEN_CACHE_ALIAS') or None
+
+# wsgi — синхронные воркеры gunicorn, asgi — воркеры uvicorn
+# и асинхронные представления для горячих запросов на чтение.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -117,12 +166,21 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 }
 
+# Списки рецептов и подписок без полей DRF, JSON через orjson;
+# см. api/fast_serializers.py.
+FAST_SERIALIZERS = os.getenv('FAST_SERIALIZERS', 'False') == 'True'
+if FAST_SERIALIZERS:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+
 
 DJOSER = {
     'LOGIN_FIELD': 'email',
@@ -145,3 +203,8 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
@@ -15,18 +15,20 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
-from django.shortcuts import redirect
 from django.urls import include, path
 
-
-def redirect_to_recipe(request, id):
-    return redirect(f'/recipes/{id}/')
+if settings.SERVER_MODE == 'asgi':
+    from api.async_views import redirect_to_recipe as short_link
+else:
+    from api.views import redirect_to_recipe as short_link
 
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('api/', include('api.urls')),
     path('admin/', admin.site.urls),
-    path('s/<int:id>/', redirect_to_recipe, name='short_link'),
+    path('s/<int:id>/', short_link, name='short_link_legacy'),
+    path('s/<str:code>/', short_link, name='short_link'),
 ]
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart)
+                     ShoppingCart, ShoppingListItem)
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -12,7 +12,9 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'pub_date')
+    list_display = (
+        'name', 'author', 'pub_date', 'favorites_count', 'short_link_clicks'
+    )
     search_fields = ('name', 'author__username')
     list_filter = ('author', 'name', 'pub_date')
     inlines = (RecipeIngredientInline,)
@@ -29,3 +31,10 @@ class IngredientAdmin(admin.ModelAdmin):
 
 admin.site.register(Favorite)
 admin.site.register(ShoppingCart)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'total')
+    search_fields = ('user__username', 'ingredient__name')
+    readonly_fields = ('user', 'ingredient', 'total')
@@ -0,0 +1,36 @@
+"""Пересчёт денормализованных счётчиков по исходным таблицам."""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import SomeUser, Subscription
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def recount_recipes(recipe_ids=None):
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    return recipes.update(
+        favorites_count=_count(Favorite, 'recipe'),
+        shopping_cart_count=_count(ShoppingCart, 'recipe'),
+    )
+
+
+def recount_users(user_ids=None):
+    users = SomeUser.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    return users.update(
+        recipes_count=_count(Recipe, 'author'),
+        followers_count=_count(Subscription, 'author'),
+        following_count=_count(Subscription, 'user'),
+    )
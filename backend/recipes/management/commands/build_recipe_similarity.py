@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.constants import SIMILARITY_CHUNK_SIZE, SIMILARITY_TOP_K
+from recipes.similarity import build_similarity
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт похожих рецептов по избранному, корзинам '
+        'и ингредиентам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=SIMILARITY_TOP_K,
+            help='Сколько соседей хранить для рецепта.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SIMILARITY_CHUNK_SIZE,
+            help='Сколько рецептов считать за одно умножение матриц.'
+        )
+
+    def handle(self, *args, **options):
+        recipes, rows = build_similarity(
+            options['top_k'], options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов: {recipes}, соседей записано: {rows}.'
+        ))
@@ -1,50 +1,250 @@
+import csv
+import io
 import json
+import time
+from itertools import islice
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from api.indexes import ingredient_index
+from foodgram.constants import MAX_LENGTH_UNIT
 from recipes.models import Ingredient
 
+JSON_CHUNK_SIZE = 64 * 1024
+NAME_MAX_LENGTH = Ingredient._meta.get_field('name').max_length
 
-class Command(BaseCommand):
-    help = 'Импорт ингредиентов в базу данных'
 
-    def handle(self, *args, **options):
-        base_dir = Path(settings.BASE_DIR)
-        potential_paths = [
-            base_dir / 'data' / 'ingredients.json',
-            base_dir.parent / 'data' / 'ingredients.json',
-            Path('/app/data/ingredients.json'),
-        ]
-
-        target_file = None
-        for path in potential_paths:
-            if path.exists():
-                target_file = path
+def read_csv(file):
+    """Строки «название,единица» без заголовка."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+        elif any(row):
+            yield None
+
+
+def read_json(file):
+    """Элементы массива верхнего уровня по одному, без json.load."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(JSON_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
                 break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Ожидался массив JSON.')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            if isinstance(item, dict):
+                yield item.get('name'), item.get('measurement_unit')
+            else:
+                yield None
+        if not chunk:
+            if started:
+                raise ValueError('Массив JSON не закрыт.')
+            return
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
 
-        if not target_file:
-            raise CommandError('Файл ingredients.json не найден.')
+def clean(rows):
+    """Обрезает пробелы и отбрасывает строки, которые не влезут в модель."""
+    for row in rows:
+        if row is None:
+            yield None
+            continue
+        name, unit = (str(value or '').strip() for value in row)
+        if (
+            not name or not unit
+            or len(name) > NAME_MAX_LENGTH or len(unit) > MAX_LENGTH_UNIT
+        ):
+            yield None
+        else:
+            yield name, unit
+
+
+class CopyStream(io.TextIOBase):
+    """Файлоподобная обёртка над строками для COPY ... FROM STDIN."""
+
+    def __init__(self, rows, stats):
+        self._lines = self._iter_lines(rows, stats)
+
+    @staticmethod
+    def _escape(value):
+        return (
+            value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r')
+        )
+
+    def _iter_lines(self, rows, stats):
+        for row in rows:
+            stats['read'] += 1
+            if row is None:
+                stats['invalid'] += 1
+                continue
+            yield '\t'.join(self._escape(value) for value in row) + '\n'
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        """Целые строки общей длиной не меньше size (или все оставшиеся)."""
+        lines = []
+        length = 0
+        for line in self._lines:
+            lines.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        return ''.join(lines)
 
-        self.stdout.write(f'Чтение файла: {target_file}')
 
+class Command(BaseCommand):
+    help = (
+        'Импорт ингредиентов из CSV или JSON. Повторный запуск не создаёт '
+        'дубликатов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            help='Файл .csv или .json; по умолчанию data/ingredients.csv.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только прочитать и проверить файл, ничего не записывая.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='На Postgres вставлять пачками вместо COPY.'
+        )
+
+    def find_file(self, path):
+        if path:
+            path = Path(path)
+            if not path.exists():
+                raise CommandError(f'Файл {path} не найден.')
+            return path
+        base_dir = Path(settings.BASE_DIR)
+        for directory in (
+            base_dir / 'data', base_dir.parent / 'data', Path('/app/data')
+        ):
+            for name in ('ingredients.csv', 'ingredients.json'):
+                if (directory / name).exists():
+                    return directory / name
+        raise CommandError('Файл ingredients.csv или ingredients.json '
+                           'не найден.')
+
+    def handle(self, *args, **options):
+        path = self.find_file(options['path'])
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        self.stdout.write(f'Чтение файла: {path}')
+
+        stats = {'read': 0, 'invalid': 0}
+        started = time.perf_counter()
+        before = Ingredient.objects.count()
         try:
-            with open(target_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-
-            objs = [
-                Ingredient(
-                    name=item['name'],
-                    measurement_unit=item['measurement_unit']
-                )
-                for item in data
-            ]
-
-            Ingredient.objects.bulk_create(objs, ignore_conflicts=True)
-            self.stdout.write(
-                self.style.SUCCESS(f'Добавлено: {len(objs)} ингредиентов.')
+            with open(path, encoding='utf-8', newline='') as file:
+                rows = clean(reader(file))
+                if options['dry_run']:
+                    self.count_only(rows, stats)
+                elif (
+                    connection.vendor == 'postgresql'
+                    and not options['no_copy']
+                ):
+                    self.copy(rows, stats)
+                else:
+                    self.insert_batches(rows, stats, options['batch_size'])
+        except (ValueError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f'Ошибка импорта: {error}')
+        elapsed = time.perf_counter() - started
+
+        added = 0
+        if not options['dry_run']:
+            added = Ingredient.objects.count() - before
+            if added:
+                ingredient_index.invalidate()
+        report = (
+            f'Прочитано: {stats["read"]}, некорректных: {stats["invalid"]}'
+        )
+        if options['dry_run']:
+            report += ' (пробный запуск, база не изменена)'
+        else:
+            valid = stats['read'] - stats['invalid']
+            report += f', добавлено: {added}, уже были: {valid - added}'
+        self.stdout.write(self.style.SUCCESS(report))
+        self.stdout.write(
+            f'Время: {elapsed:.2f} с, '
+            f'{stats["read"] / elapsed if elapsed else 0:.0f} строк/с.'
+        )
+
+    def count_only(self, rows, stats):
+        for row in rows:
+            stats['read'] += 1
+            if row is None:
+                stats['invalid'] += 1
+
+    def insert_batches(self, rows, stats, batch_size):
+        """INSERT пачками; конфликт по unique_ingredient пропускается."""
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            stats['read'] += len(batch)
+            valid = dict.fromkeys(row for row in batch if row is not None)
+            stats['invalid'] += len(batch) - sum(
+                row is not None for row in batch
+            )
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in valid
+                ),
+                ignore_conflicts=True
             )
 
-        except Exception as error:
-            raise CommandError(f'Ошибка импорта: {error}')
+    @transaction.atomic
+    def copy(self, rows, stats):
+        """COPY во временную таблицу и одна вставка без конфликтов."""
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_import (name, measurement_unit) FROM STDIN',
+                CopyStream(rows, stats)
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_import '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Пересборка лент подписок (FeedItem) по подпискам и рецептам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='id подписчика; можно указать несколько раз.'
+        )
+
+    def handle(self, *args, **options):
+        created = FeedItem.objects.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {created}.'
+        ))
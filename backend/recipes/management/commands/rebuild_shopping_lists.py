@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.shopping_list import bump_cart_version
+from recipes.models import ShoppingCart, ShoppingListItem
+
+MISMATCHES_SHOWN = 50
+
+
+class Command(BaseCommand):
+    help = 'Пересборка и проверка сумм списков покупок (ShoppingListItem)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения с корзинами, ничего не меняя.'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='id пользователя; можно указать несколько раз.'
+        )
+
+    def handle(self, *args, **options):
+        users = options['users']
+        if options['check']:
+            self.check_lists(users)
+            return
+        affected = users or set(ShoppingListItem.objects.values_list(
+            'user_id', flat=True
+        ).distinct()) | set(ShoppingCart.objects.values_list(
+            'user_id', flat=True
+        ).distinct())
+        created = ShoppingListItem.objects.rebuild(users)
+        bump_cart_version(*affected)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано позиций: {created}, пользователей: {len(affected)}.'
+        ))
+
+    def check_lists(self, users):
+        mismatches = ShoppingListItem.objects.find_mismatches(users)
+        for user_id, ingredient_id, expected, actual in mismatches[
+            :MISMATCHES_SHOWN
+        ]:
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'ожидалось {expected}, в таблице {actual}.'
+            )
+        if mismatches:
+            raise CommandError(
+                f'Расхождений: {len(mismatches)}. Исправить: '
+                'python manage.py rebuild_shopping_lists'
+            )
+        self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import recount_recipes, recount_users
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, корзин, рецептов и подписок'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = recount_recipes()
+        users = recount_users()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: рецептов {recipes}, пользователей {users}.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.response_cache import response_cache
+from recipes.models import RecipeScore
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт рейтингов popular и trending по новым событиям '
+        'избранного и корзин'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать по всей истории с новой точкой отсчёта.'
+        )
+
+    def handle(self, *args, **options):
+        events, recipes = RecipeScore.objects.refresh(options['rebuild'])
+        if events or options['rebuild']:
+            response_cache.invalidate('recipes:list')
+        self.stdout.write(self.style.SUCCESS(
+            f'Учтено событий: {events}, рецептов: {recipes}.'
+        ))
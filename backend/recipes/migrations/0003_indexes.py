@@ -0,0 +1,61 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+POSTGRES_INDEXES = (
+    (
+        'ingredient_name_pattern_idx',
+        'CREATE INDEX ingredient_name_pattern_idx ON recipes_ingredient '
+        '(name varchar_pattern_ops)',
+    ),
+    (
+        'ingredient_name_trgm_idx',
+        'CREATE INDEX ingredient_name_trgm_idx ON recipes_ingredient '
+        'USING gin (UPPER(name) gin_trgm_ops)',
+    ),
+    (
+        'recipeingredient_cart_idx',
+        'CREATE INDEX recipeingredient_cart_idx ON recipes_recipeingredient '
+        '(recipe_id) INCLUDE (ingredient_id, amount)',
+    ),
+)
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for _, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:08
+
+import re
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'recipes_recipe_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+# Тот же вектор, что строит recipes.search на момент этой миграции.
+FILL_SEARCH_VECTOR = """
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', COALESCE(name, '')), 'A')
+    || setweight(to_tsvector('russian', COALESCE((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS item
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = item.ingredient_id
+        WHERE item.recipe_id = recipes_recipe.id
+    ), '')), 'B')
+    || setweight(to_tsvector('russian', COALESCE(text, '')), 'C')
+"""
+
+
+def tokens(value):
+    return ' '.join(TOKEN_RE.findall(value.casefold().replace('ё', 'е')))
+
+
+def fill_fts_table(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    names = {}
+    for recipe_id, name in RecipeIngredient.objects.values_list(
+        'recipe_id', 'ingredient__name'
+    ).order_by('ingredient__name').iterator():
+        names.setdefault(recipe_id, []).append(name)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (pk, tokens(name), tokens(' '.join(names.get(pk, []))),
+                 tokens(text))
+                for pk, name, text in Recipe.objects.values_list(
+                    'pk', 'name', 'text'
+                ).iterator()
+            ]
+        )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx ON recipes_recipe '
+            'USING gin (search_vector)'
+        )
+        schema_editor.execute(FILL_SEARCH_VECTOR)
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+            'USING fts5(name, ingredients, text)'
+        )
+        fill_fts_table(apps, schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
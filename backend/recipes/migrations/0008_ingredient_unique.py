@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Отдельно от 0007: на Postgres ALTER TABLE в одной транзакции
+    # с удалением строк упирается в отложенные проверки внешних ключей.
+
+    dependencies = [
+        ('recipes', '0007_merge_duplicate_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
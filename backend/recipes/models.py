@@ -1,6 +1,21 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Exists, F, OuterRef, Prefetch, Q, Sum,
+                              Value, When, Window)
+from django.db.models.functions import Greatest, RowNumber
+from django.utils import timezone
+
+from foodgram.constants import (FEED_BACKFILL_LIMIT, FEED_FANOUT_MAX_FOLLOWERS,
+                                RECIPE_SCORE_BATCH_SIZE,
+                                RECIPE_SCORE_CART_WEIGHT,
+                                RECIPE_SCORE_FAVORITE_WEIGHT,
+                                RECIPE_SCORE_HALF_LIVES, RECIPE_SCORE_LAG,
+                                RECIPE_SCORE_REBASE_AFTER)
+from users.models import ManagedFieldsMixin, Subscription
 
 User = get_user_model()
 
@@ -13,12 +28,67 @@ class Ingredient(models.Model):
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        indexes = [
+            models.Index(fields=['name'], name='ingredient_name_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+
+    def with_user_flags(self, user):
+        """Подгружает автора и ингредиенты, аннотирует флаги пользователя.
+
+        Количество запросов не зависит от числа рецептов в выборке.
+        """
+        authors = User.objects.all()
+        if user.is_authenticated:
+            authors = authors.annotate(is_subscribed=Exists(
+                Subscription.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+            queryset = self.annotate(
+                is_favorited=Exists(Favorite.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+            )
+        else:
+            authors = authors.annotate(is_subscribed=Value(False))
+            queryset = self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return queryset.defer('search_vector').prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ),
+        )
+
+    def ranked(self, ranking):
+        """Сортировка по рейтингу RecipeScore, лучшие сверху.
+
+        Фильтр по score делает соединение внутренним: строка рейтинга
+        создаётся вместе с рецептом (см. api.signals), а ORDER BY идёт
+        по индексу RecipeScore.
+        """
+        return self.filter(score__isnull=False).order_by(
+            f'-score__{ranking}', '-score__recipe_id'
+        )
+
+
+class Recipe(ManagedFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -30,6 +100,9 @@ class Recipe(models.Model):
         'Картинка',
         upload_to='recipes/images/'
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии картинки', default=dict, editable=False
+    )
     text = models.TextField('Описание')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -41,11 +114,43 @@ class Recipe(models.Model):
         validators=[MinValueValidator(1, message='Минимум 1 минута')]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном', default=0, editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'В списках покупок', default=0, editable=False
+    )
+    short_link_clicks = models.PositiveIntegerField(
+        'Переходы по короткой ссылке', default=0, editable=False
+    )
+
+    managed_fields = (
+        'image_variants', 'favorites_count', 'shopping_cart_count',
+        'short_link_clicks'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-pub_date'],
+                name='recipe_favorites_count_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -91,6 +196,7 @@ class Favorite(models.Model):
         related_name='favorites',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField('Добавлен', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Избранное'
@@ -101,6 +207,9 @@ class Favorite(models.Model):
                 name='unique_favorite'
             )
         ]
+        indexes = [
+            models.Index(fields=['created'], name='favorite_created_idx'),
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -116,6 +225,7 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField('Добавлен', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -126,3 +236,545 @@ class ShoppingCart(models.Model):
                 name='unique_shopping_cart'
             )
         ]
+        indexes = [
+            models.Index(fields=['created'], name='shopping_cart_created_idx'),
+        ]
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    """Поддержка сумм списка покупок при изменении корзины и рецептов.
+
+    Добавление в корзину учитывают вьюсеты, удаление строк корзины
+    и любые изменения ингредиентов рецепта — приёмники в api.signals,
+    поэтому суммы верны и при каскадном удалении.
+    """
+
+    def lock_users(self, user_ids):
+        """Блокирует строки пользователей до конца транзакции.
+
+        Под этой блокировкой меняются корзина и суммы пользователя,
+        поэтому параллельные запросы не учитывают рецепт дважды.
+        """
+        list(User.objects.select_for_update().filter(
+            pk__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def apply(self, user_ids, deltas):
+        """Прибавляет {ingredient_id: изменение} к спискам пользователей.
+
+        Строки пользователей блокируются, поэтому параллельные изменения
+        одной корзины не теряют слагаемых. Нулевые суммы удаляются.
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        user_ids = sorted(set(user_ids))
+        if not deltas or not user_ids:
+            return
+        with transaction.atomic():
+            self.lock_users(user_ids)
+            items = self.filter(
+                user_id__in=user_ids, ingredient_id__in=deltas
+            )
+            existing = set(items.values_list('user_id', 'ingredient_id'))
+            items.update(total=Greatest(F('total') + Case(
+                *(
+                    When(ingredient_id=pk, then=Value(delta))
+                    for pk, delta in deltas.items()
+                ),
+                default=Value(0)
+            ), Value(0)))
+            self.bulk_create(
+                self.model(user_id=user_id, ingredient_id=pk, total=delta)
+                for user_id in user_ids
+                for pk, delta in deltas.items()
+                if delta > 0 and (user_id, pk) not in existing
+            )
+            items.filter(total=0).delete()
+
+    def add_recipes(self, user_id, recipe_ids, sign=1):
+        """Учитывает рецепты, добавленные в корзину (sign=-1 — убранные)."""
+        self.apply([user_id], {
+            pk: sign * total
+            for pk, total in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values('ingredient_id').annotate(
+                total=Sum('amount')
+            ).values_list('ingredient_id', 'total')
+        })
+
+    def remove_recipes(self, user_id, recipe_ids):
+        self.add_recipes(user_id, recipe_ids, sign=-1)
+
+    def change_recipe(self, recipe_id, deltas):
+        """Переносит изменение ингредиентов рецепта во все корзины с ним."""
+        self.apply(
+            ShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('user_id', flat=True),
+            deltas
+        )
+
+    def expected_totals(self, user_ids=None):
+        """Суммы заново по корзинам: {(user, ingredient): total}."""
+        # Одно условие на корзину: второй filter() по ней добавил бы
+        # ещё одно соединение и удвоил суммы.
+        rows = RecipeIngredient.objects.filter(
+            recipe__shopping_cart__isnull=False
+        ) if user_ids is None else RecipeIngredient.objects.filter(
+            recipe__shopping_cart__user_id__in=user_ids
+        )
+        return {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in rows.values(
+                'recipe__shopping_cart__user_id', 'ingredient_id'
+            ).annotate(total=Sum('amount')).values_list(
+                'recipe__shopping_cart__user_id', 'ingredient_id', 'total'
+            ).order_by()
+        }
+
+    def find_mismatches(self, user_ids=None):
+        """Расхождения (user, ingredient, ожидалось, в таблице)."""
+        items = self.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        actual = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in items.values_list(
+                'user_id', 'ingredient_id', 'total'
+            )
+        }
+        expected = self.expected_totals(user_ids)
+        return sorted(
+            (*key, expected.get(key), actual.get(key))
+            for key in expected.keys() | actual.keys()
+            if expected.get(key) != actual.get(key)
+        )
+
+    @transaction.atomic
+    def rebuild(self, user_ids=None):
+        """Пересобирает списки пользователей (всех, если user_ids нет)."""
+        items = self.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        items.delete()
+        return len(self.bulk_create(
+            (
+                self.model(user_id=user_id, ingredient_id=pk, total=total)
+                for (user_id, pk), total in self.expected_totals(
+                    user_ids
+                ).items()
+            ),
+            batch_size=1000
+        ))
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    total = models.PositiveIntegerField('Количество')
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+
+class FeedItemQuerySet(models.QuerySet):
+    """Ленты подписок: раскладка при публикации и склейка при чтении.
+
+    Рецепты авторов, у которых не больше FEED_FANOUT_MAX_FOLLOWERS
+    подписчиков, записываются в ленту каждого подписчика. Рецепты
+    остальных авторов читаются из Recipe при выдаче страницы, поэтому
+    публикация стоит не больше FEED_FANOUT_MAX_FOLLOWERS вставок.
+    """
+
+    def fan_out(self, recipe):
+        """Кладёт новый рецепт в ленты подписчиков автора."""
+        if not User.objects.filter(
+            pk=recipe.author_id,
+            followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+        ).exists():
+            return 0
+        return len(self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id, recipe_id=recipe.pk,
+                    author_id=recipe.author_id, pub_date=recipe.pub_date
+                )
+                for user_id in Subscription.objects.filter(
+                    author_id=recipe.author_id
+                ).values_list('user_id', flat=True).iterator()
+            ),
+            batch_size=1000,
+            ignore_conflicts=True
+        ))
+
+    def latest_recipes(self, author_ids):
+        """По FEED_BACKFILL_LIMIT последних рецептов авторов."""
+        return Recipe.objects.filter(author_id__in=author_ids).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc())
+            )
+        ).filter(position__lte=FEED_BACKFILL_LIMIT).values_list(
+            'id', 'author_id', 'pub_date'
+        )
+
+    def fill(self, subscriptions):
+        """Заполняет ленты по парам (подписчик, автор).
+
+        Авторы с большим числом подписчиков пропускаются.
+        """
+        followers = {}
+        for user_id, author_id in subscriptions:
+            followers.setdefault(author_id, []).append(user_id)
+        author_ids = User.objects.filter(
+            pk__in=followers,
+            followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True)
+        return len(self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id, recipe_id=recipe_id,
+                    author_id=author_id, pub_date=pub_date
+                )
+                for recipe_id, author_id, pub_date in self.latest_recipes(
+                    list(author_ids)
+                ).iterator()
+                for user_id in followers[author_id]
+            ),
+            batch_size=1000,
+            ignore_conflicts=True
+        ))
+
+    def add_authors(self, user_id, author_ids):
+        """Дозаполняет ленту после подписки на авторов."""
+        return self.fill((user_id, author_id) for author_id in author_ids)
+
+    def remove_authors(self, user_id, author_ids):
+        """Чистит ленту после отписки; возвращает авторов для refill.
+
+        Вызывается после обновления счётчиков: авторы, у которых
+        подписчиков стало ровно FEED_FANOUT_MAX_FOLLOWERS, снова
+        раскладываются при записи, и их лентам нужны прошлые рецепты.
+        """
+        self.filter(user_id=user_id, author_id__in=author_ids).delete()
+        return list(User.objects.filter(
+            pk__in=author_ids, followers_count=FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True))
+
+    def refill(self, author_ids):
+        """Дозаполняет ленты всех подписчиков авторов.
+
+        До FEED_FANOUT_MAX_FOLLOWERS * FEED_BACKFILL_LIMIT вставок,
+        поэтому не вызывается из запроса (см. api.feeds).
+        """
+        return self.fill(Subscription.objects.filter(
+            author_id__in=author_ids
+        ).values_list('user_id', 'author_id').iterator())
+
+    def page(self, user_id, limit, after=None):
+        """id рецептов ленты, новые сверху.
+
+        after — (pub_date, id) последнего рецепта прошлой страницы.
+        """
+        pushed = self.filter(user_id=user_id)
+        pulled = Recipe.objects.filter(author__in=Subscription.objects.filter(
+            user_id=user_id,
+            author__followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+        ).values('author'))
+        if after is not None:
+            pub_date, pk = after
+            pushed = pushed.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, recipe__lt=pk)
+            )
+            pulled = pulled.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        rows = sorted(
+            [
+                *pushed.order_by('-pub_date', '-recipe').values_list(
+                    'pub_date', 'recipe'
+                )[:limit],
+                *pulled.order_by('-pub_date', '-id').values_list(
+                    'pub_date', 'id'
+                )[:limit],
+            ],
+            reverse=True
+        )
+        # Рецепт автора, ставшего популярным, может прийти из обеих выборок.
+        return list(dict.fromkeys(pk for _, pk in rows))[:limit]
+
+    @transaction.atomic
+    def rebuild(self, user_ids=None):
+        """Пересобирает ленты пользователей (всех, если user_ids нет)."""
+        items = self.all()
+        subscriptions = Subscription.objects.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+            subscriptions = subscriptions.filter(user_id__in=user_ids)
+        items.delete()
+        return self.fill(
+            subscriptions.values_list('user_id', 'author_id').iterator()
+        )
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    objects = FeedItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_item_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='feed_item_user_author_idx'
+            ),
+        ]
+
+
+class RecipeScoreState(models.Model):
+    """Единственная строка: откуда считать следующие события.
+
+    Вклад события — вес * 2 ** ((created - epoch) / период полураспада).
+    Общий множитель затухания одинаков для всех рецептов и на порядок
+    не влияет, поэтому старые вклады не пересчитываются.
+    """
+    epoch = models.DateTimeField('Точка отсчёта')
+    watermark = models.DateTimeField('Учтены события до')
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+
+class RecipeScoreQuerySet(models.QuerySet):
+    """Рейтинги popular и trending по избранному и корзинам.
+
+    refresh учитывает только события после watermark, удаление
+    события вычитает его вклад (см. api.signals), так что стоимость
+    пересчёта не растёт с историей.
+    """
+
+    events = (
+        (Favorite, RECIPE_SCORE_FAVORITE_WEIGHT),
+        (ShoppingCart, RECIPE_SCORE_CART_WEIGHT),
+    )
+
+    @staticmethod
+    def contribution(weight, created, epoch):
+        age = (created - epoch).total_seconds()
+        return {
+            ranking: weight * 2 ** (age / half_life)
+            for ranking, half_life in RECIPE_SCORE_HALF_LIVES.items()
+        }
+
+    def add_missing(self):
+        """Создаёт нулевые рейтинги рецептам, у которых их нет."""
+        return len(self.bulk_create(
+            (
+                self.model(recipe_id=pk)
+                for pk in Recipe.objects.filter(
+                    score__isnull=True
+                ).values_list('pk', flat=True).iterator()
+            ),
+            batch_size=RECIPE_SCORE_BATCH_SIZE,
+            ignore_conflicts=True
+        ))
+
+    def apply(self, deltas):
+        """Прибавляет {recipe_id: {рейтинг: вклад}} пачками UPDATE."""
+        recipe_ids = list(deltas)
+        for start in range(0, len(recipe_ids), RECIPE_SCORE_BATCH_SIZE):
+            batch = recipe_ids[start:start + RECIPE_SCORE_BATCH_SIZE]
+            self.filter(recipe_id__in=batch).update(**{
+                ranking: F(ranking) + Case(
+                    *(
+                        When(
+                            recipe_id=pk,
+                            then=Value(deltas[pk][ranking])
+                        )
+                        for pk in batch
+                    ),
+                    default=Value(0.0),
+                    output_field=models.FloatField()
+                )
+                for ranking in RECIPE_SCORE_HALF_LIVES
+            })
+
+    def rebase(self, state, epoch):
+        """Переносит точку отсчёта, пока множители не переполнились."""
+        age = (epoch - state.epoch).total_seconds()
+        self.update(**{
+            ranking: F(ranking) * 2 ** (-age / half_life)
+            for ranking, half_life in RECIPE_SCORE_HALF_LIVES.items()
+        })
+        state.epoch = epoch
+
+    @transaction.atomic
+    def refresh(self, rebuild=False, until=None):
+        """Учитывает события до until; возвращает (событий, рецептов).
+
+        По умолчанию until отстаёт от текущего времени на
+        RECIPE_SCORE_LAG: событие из ещё не закрытой транзакции
+        попадёт в следующий запуск, а не потеряется.
+        """
+        if until is None:
+            until = timezone.now() - timedelta(seconds=RECIPE_SCORE_LAG)
+        state = RecipeScoreState.objects.select_for_update().filter(
+            pk=1
+        ).first()
+        since = None
+        if state is None or rebuild:
+            state = RecipeScoreState(pk=1, epoch=until)
+            self.update(**{ranking: 0 for ranking in RECIPE_SCORE_HALF_LIVES})
+        else:
+            since = state.watermark
+            if until - state.epoch > timedelta(
+                seconds=RECIPE_SCORE_REBASE_AFTER
+            ):
+                self.rebase(state, until)
+        self.add_missing()
+        deltas = {}
+        events = 0
+        for model, weight in self.events:
+            rows = model.objects.filter(created__lte=until)
+            if since is not None:
+                rows = rows.filter(created__gt=since)
+            for recipe_id, created in rows.values_list(
+                'recipe_id', 'created'
+            ).iterator():
+                events += 1
+                total = deltas.setdefault(
+                    recipe_id, dict.fromkeys(RECIPE_SCORE_HALF_LIVES, 0.0)
+                )
+                for ranking, value in self.contribution(
+                    weight, created, state.epoch
+                ).items():
+                    total[ranking] += value
+        self.apply(deltas)
+        state.watermark = until
+        state.save()
+        return events, len(deltas)
+
+    def retract(self, model, recipe_id, created):
+        """Вычитает вклад удалённого события, если refresh его учёл."""
+        state = RecipeScoreState.objects.filter(pk=1).first()
+        if state is None or created > state.watermark:
+            return
+        self.filter(recipe_id=recipe_id).update(**{
+            ranking: F(ranking) - value
+            for ranking, value in self.contribution(
+                dict(self.events)[model], created, state.epoch
+            ).items()
+        })
+
+
+class RecipeScore(models.Model):
+    """Рейтинги рецепта; пересчитывает update_recipe_scores."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт'
+    )
+    popular = models.FloatField('Популярность', default=0)
+    trending = models.FloatField('Тренд', default=0)
+
+    objects = RecipeScoreQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=['-popular', '-recipe'],
+                name='recipe_score_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending', '-recipe'],
+                name='recipe_score_trending_idx'
+            ),
+        ]
+
+
+class RecipeSimilarity(models.Model):
+    """Сосед рецепта из top-K; считает build_recipe_similarity."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_recipe_similarity'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='recipe_similarity_score_idx'
+            ),
+        ]
@@ -0,0 +1,108 @@
+"""Полнотекстовый поиск рецептов.
+
+На PostgreSQL используется столбец Recipe.search_vector с GIN-индексом,
+на SQLite — виртуальная таблица FTS5 с тем же набором полей.
+"""
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from foodgram.constants import SEARCH_CONFIG, SEARCH_WEIGHTS
+from recipes.models import Recipe, RecipeIngredient
+
+FTS_TABLE = 'recipes_recipe_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def get_tokens(query):
+    return TOKEN_RE.findall(query.casefold().replace('ё', 'е'))
+
+
+def update_search_index(recipe_ids):
+    """Пересчитывает поисковый индекс для переданных рецептов."""
+    recipe_ids = list(recipe_ids)
+    if connection.vendor == 'postgresql':
+        names = RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', ' ')
+        ).values('names')
+        Recipe.objects.filter(pk__in=recipe_ids).update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                Coalesce(Subquery(names), Value(''), output_field=TextField()),
+                weight='B',
+                config=SEARCH_CONFIG
+            )
+            + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        ))
+    elif connection.vendor == 'sqlite':
+        rows = []
+        for recipe in Recipe.objects.filter(
+            pk__in=recipe_ids
+        ).prefetch_related('ingredients').only('id', 'name', 'text'):
+            rows.append((
+                recipe.id,
+                ' '.join(get_tokens(recipe.name)),
+                ' '.join(get_tokens(' '.join(
+                    ingredient.name for ingredient in recipe.ingredients.all()
+                ))),
+                ' '.join(get_tokens(recipe.text)),
+            ))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in recipe_ids]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+                'VALUES (%s, %s, %s, %s)',
+                rows
+            )
+
+
+def remove_from_search_index(recipe_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [recipe_id]
+            )
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по запросу и аннотирует search_rank.
+
+    Каждое слово запроса ищется как префикс, все слова обязательны.
+    """
+    tokens = get_tokens(query)
+    if not tokens:
+        return queryset
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            ' & '.join(f'{token}:*' for token in tokens),
+            config=SEARCH_CONFIG,
+            search_type='raw'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(
+                'search_vector', search_query, weights=SEARCH_WEIGHTS
+            )
+        ).order_by('-search_rank', '-pub_date')
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    weights = ', '.join(
+        str(weight) for weight in reversed(SEARCH_WEIGHTS[1:])
+    )
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    )).annotate(search_rank=RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = recipes_recipe.id',
+        (match,)
+    )).order_by('-search_rank', '-pub_date')
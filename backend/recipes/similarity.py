@@ -0,0 +1,142 @@
+"""Похожие рецепты: сходство item-item и top-K соседей.
+
+Сходство пары рецептов — взвешенная сумма косинусной близости по
+избранному и по корзинам (матрицы пользователь × рецепт) и коэффициента
+Жаккара по ингредиентам. Матрицы разреженные, произведения считаются
+пачками по SIMILARITY_CHUNK_SIZE рецептов, поэтому память ограничена
+размером пачки, а не квадратом числа рецептов.
+"""
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from foodgram.constants import (SIMILARITY_CART_WEIGHT, SIMILARITY_CHUNK_SIZE,
+                                SIMILARITY_FAVORITE_WEIGHT,
+                                SIMILARITY_INGREDIENT_WEIGHT, SIMILARITY_TOP_K)
+from recipes.models import (Favorite, Recipe, RecipeIngredient,
+                            RecipeSimilarity, ShoppingCart)
+
+
+def load_pairs(queryset, *fields):
+    """Пары значений полей в виде массива NumPy формы (n, 2)."""
+    return np.fromiter(
+        chain.from_iterable(
+            queryset.values_list(*fields).order_by().iterator(
+                chunk_size=SIMILARITY_CHUNK_SIZE * 10
+            )
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def recipe_matrix(recipe_ids, pairs):
+    """Бинарная матрица «рецепт × объект» по парам (рецепт, объект).
+
+    Пары с рецептами не из recipe_ids пропускаются.
+    """
+    positions = np.searchsorted(recipe_ids, pairs[:, 0])
+    positions = np.minimum(positions, len(recipe_ids) - 1)
+    known = recipe_ids[positions] == pairs[:, 0]
+    columns, others = np.unique(pairs[known, 1], return_inverse=True)
+    return sparse.csr_matrix(
+        (
+            np.ones(known.sum(), dtype=np.float32),
+            (positions[known], others)
+        ),
+        shape=(len(recipe_ids), len(columns))
+    )
+
+
+def cosine_factor(matrix):
+    """Строки, делённые на свою длину: A @ A.T — косинусы."""
+    lengths = np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+    lengths[lengths == 0] = 1
+    return sparse.diags(1 / lengths).dot(matrix).tocsr()
+
+
+def chunk_scores(start, stop, favorites, carts, ingredients, sizes):
+    """Сходство рецептов start:stop со всеми рецептами."""
+    scores = SIMILARITY_FAVORITE_WEIGHT * favorites[start:stop].dot(
+        favorites.T
+    )
+    scores += SIMILARITY_CART_WEIGHT * carts[start:stop].dot(carts.T)
+    common = ingredients[start:stop].dot(ingredients.T).tocoo()
+    union = sizes[common.row + start] + sizes[common.col] - common.data
+    scores = (scores + SIMILARITY_INGREDIENT_WEIGHT * sparse.csr_matrix(
+        (common.data / union, (common.row, common.col)), shape=common.shape
+    )).tocoo()
+    # Рецепт не сосед сам себе.
+    keep = (scores.row + start != scores.col) & (scores.data > 0)
+    return sparse.csr_matrix(
+        (scores.data[keep], (scores.row[keep], scores.col[keep])),
+        shape=scores.shape
+    )
+
+
+def top_neighbours(scores, top_k):
+    """(строка, столбцы, сходство) для K лучших соседей каждой строки."""
+    for row in range(scores.shape[0]):
+        begin, end = scores.indptr[row], scores.indptr[row + 1]
+        columns = scores.indices[begin:end]
+        values = scores.data[begin:end]
+        if len(values) > top_k:
+            best = np.argpartition(-values, top_k)[:top_k]
+            columns, values = columns[best], values[best]
+        yield row, columns, values
+
+
+def build_similarity(top_k=SIMILARITY_TOP_K, chunk_size=SIMILARITY_CHUNK_SIZE):
+    """Пересчитывает RecipeSimilarity; возвращает (рецептов, строк).
+
+    Соседи каждой пачки заменяются в отдельной транзакции: чтение
+    видит прошлый или новый список рецепта, но не смесь.
+    """
+    recipe_ids = np.fromiter(
+        Recipe.objects.order_by('pk').values_list('pk', flat=True),
+        dtype=np.int64
+    )
+    if not len(recipe_ids):
+        return 0, 0
+    favorites = cosine_factor(recipe_matrix(
+        recipe_ids, load_pairs(Favorite.objects, 'recipe_id', 'user_id')
+    ))
+    carts = cosine_factor(recipe_matrix(
+        recipe_ids, load_pairs(ShoppingCart.objects, 'recipe_id', 'user_id')
+    ))
+    ingredients = recipe_matrix(recipe_ids, load_pairs(
+        RecipeIngredient.objects, 'recipe_id', 'ingredient_id'
+    ))
+    sizes = np.asarray(ingredients.sum(axis=1)).ravel()
+    created = 0
+    for start in range(0, len(recipe_ids), chunk_size):
+        stop = min(start + chunk_size, len(recipe_ids))
+        scores = chunk_scores(
+            start, stop, favorites, carts, ingredients, sizes
+        )
+        rows = [
+            (int(recipe_ids[start + row]), int(recipe_ids[column]), score)
+            for row, columns, values in top_neighbours(scores, top_k)
+            for column, score in zip(columns, values)
+        ]
+        with transaction.atomic():
+            # Рецепты, удалённые во время расчёта, пропускаются.
+            alive = set(Recipe.objects.filter(pk__in={
+                pk for row in rows for pk in row[:2]
+            }).values_list('pk', flat=True))
+            RecipeSimilarity.objects.filter(
+                recipe_id__in=recipe_ids[start:stop].tolist()
+            ).delete()
+            created += len(RecipeSimilarity.objects.bulk_create(
+                (
+                    RecipeSimilarity(
+                        recipe_id=recipe_id, similar_id=similar_id,
+                        score=float(score)
+                    )
+                    for recipe_id, similar_id, score in rows
+                    if recipe_id in alive and similar_id in alive
+                ),
+                batch_size=1000
+            ))
+    return len(recipe_ids), created
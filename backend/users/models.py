@@ -5,7 +5,26 @@ from django.db import models
 from foodgram.constants import MAX_LENGTH_EMAIL, MAX_LENGTH_NAME
 
 
-class SomeUser(AbstractUser):
+class ManagedFieldsMixin:
+    """Не перезаписывает служебные поля при сохранении объекта.
+
+    Счётчики и уменьшенные копии картинок обновляются только через
+    update(), поэтому обычный save() существующей записи пропускает
+    поля из managed_fields и, как и сам Django, отложенные поля.
+    """
+    managed_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = {*self.managed_fields, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class SomeUser(ManagedFieldsMixin, AbstractUser):
     """Модель пользователей платформы Foodgram."""
 
     username = models.CharField(
@@ -36,6 +55,23 @@ class SomeUser(AbstractUser):
         null=True,
         blank=True
     )
+    avatar_variants = models.JSONField(
+        'Уменьшенные копии аватара', default=dict, editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок', default=0, editable=False
+    )
+
+    managed_fields = (
+        'avatar_variants', 'recipes_count', 'followers_count',
+        'following_count'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']